@@ -2,19 +2,39 @@
 
 function initializeActivity() { fetchLogs(); }
 
-function fetchLogs() {
-   fetch("/api/logs")
+// /api/logs returns one page at a time, newest first; older pages are
+// fetched with the cursor of the previous one
+function fetchLogs(cursor) {
+   const url = cursor ? `/api/logs?cursor=${encodeURIComponent(cursor)}` : "/api/logs";
+   fetch(url)
       .then(res => res.json())
-      .then(data => renderLogs(data.logs))
+      .then(data => {
+         renderLogs(data.logs, Boolean(cursor));
+         renderLoadMore(data.nextCursor);
+      })
       .catch(err => console.error("Error fetching logs:", err));
 }
 
-function renderLogs(logs) {
+function renderLogs(logs, append) {
    const logsContainer = document.getElementById("activity-logs");
-   logsContainer.innerHTML = "";
+   if (!append) logsContainer.innerHTML = "";
 
    logs.forEach(log => logsContainer.innerHTML += `
        <div>
            <p>${log.timestamp} - ${log.actionType}</p>
        </div>`);
 }
+
+function renderLoadMore(nextCursor) {
+   let button = document.getElementById("load-more-logs");
+   if (!button) {
+      button = document.createElement("button");
+      button.id = "load-more-logs";
+      button.textContent = "Load older logs";
+      document.getElementById("activity-logs").after(button);
+   }
+
+   // Shown only while older logs remain
+   button.style.display = nextCursor ? "" : "none";
+   button.onclick = () => fetchLogs(nextCursor);
+}
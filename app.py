@@ -1,5 +1,6 @@
 from flask import Flask, render_template, send_from_directory
 from flask_cors import CORS
+import atexit
 import os
 from datetime import datetime
 
@@ -9,6 +10,16 @@ from api.waste import waste_bp
 from api.simulate import simulate_bp
 from api.import_export import import_export_bp
 from api.logs import logs_bp
+from api.jobs import jobs_bp
+from api.sandbox import sandbox_bp
+from models.store import InventoryStore
+from models.log_store import LogStore
+from models.log_journal import LogJournal
+from services.placement_service import IncrementalPlacer
+from services.job_service import JobManager
+from services.sandbox_service import SandboxManager
+from config import (JOB_WORKERS, JOB_HISTORY_SIZE, LOG_JOURNAL_DIR, LOG_SEGMENT_SIZE, LOG_FLUSH_INTERVAL,
+                    LOG_MEMORY_WINDOW)
 
 app = Flask(__name__)
 CORS(app)
@@ -20,11 +31,17 @@ app.register_blueprint(waste_bp, url_prefix='/api')
 app.register_blueprint(simulate_bp, url_prefix='/api')
 app.register_blueprint(import_export_bp, url_prefix='/api')
 app.register_blueprint(logs_bp, url_prefix='/api')
+app.register_blueprint(jobs_bp, url_prefix='/api')
+app.register_blueprint(sandbox_bp, url_prefix='/api')
 
 # Global data store (in-memory database)
-app.config['CONTAINERS'] = []
-app.config['ITEMS'] = []
-app.config['LOGS'] = []
+app.config['STORE'] = InventoryStore()
+app.config['PLACER'] = IncrementalPlacer(app.config['STORE'])
+app.config['JOBS'] = JobManager(JOB_WORKERS, JOB_HISTORY_SIZE)
+app.config['SANDBOXES'] = SandboxManager(app.config['STORE'])
+app.config['LOG_JOURNAL'] = LogJournal(LOG_JOURNAL_DIR, LOG_SEGMENT_SIZE, LOG_FLUSH_INTERVAL)
+app.config['LOGS'] = LogStore(app.config['LOG_JOURNAL'], LOG_MEMORY_WINDOW)
+atexit.register(app.config['LOG_JOURNAL'].close)
 app.config['CURRENT_DATE'] = "2025-04-06"
 
 @app.route('/')
@@ -0,0 +1,208 @@
+from datetime import date, datetime
+
+import numpy as np
+
+# Expiry ordinal of items that never expire
+NO_EXPIRY = np.iinfo(np.int64).max
+
+# Container index of items that are not stowed
+NO_CONTAINER = -1
+
+
+def date_ordinal(value):
+    """
+    Convert an ISO date string, date or datetime to a proleptic ordinal.
+
+    Returns:
+        ordinal: Day number, or None if the value is empty or not a date
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, (date, datetime)):
+        return value.toordinal()
+    return None
+
+
+class ItemColumns:
+    """
+    Columnar copy of the numeric item attributes.
+
+    One row per item, with NumPy columns for expiry day ordinal, uses
+    remaining (and whether they are counted down at all), mass, volume,
+    priority and container index, so inventory-wide questions (how full
+    is each zone, when does each item become waste) are array operations
+    instead of loops over item dicts. Rows are kept dense: removing an item
+    moves the last row into its place.
+    """
+
+    COLUMNS = {
+        "expiry": np.int64,
+        "uses": np.int64,
+        "counted": np.bool_,
+        "mass": np.float64,
+        "volume": np.float64,
+        "priority": np.int64,
+        "container": np.int64,
+    }
+
+    def __init__(self, capacity=64):
+        self.item_ids = []
+        self._rows = {}  # itemId -> row
+        self._container_ids = []  # container index -> containerId
+        self._container_index = {}  # containerId -> container index
+        self._size = 0
+        self._data = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+
+    def __len__(self):
+        return self._size
+
+    # Columns, as views over the used rows
+
+    @property
+    def expiry(self):
+        return self._data["expiry"][:self._size]
+
+    @property
+    def uses(self):
+        return self._data["uses"][:self._size]
+
+    @property
+    def counted(self):
+        """Rows whose uses are counted down, i.e. items with a usesRemaining."""
+        return self._data["counted"][:self._size]
+
+    @property
+    def mass(self):
+        return self._data["mass"][:self._size]
+
+    @property
+    def volume(self):
+        return self._data["volume"][:self._size]
+
+    @property
+    def priority(self):
+        return self._data["priority"][:self._size]
+
+    @property
+    def container(self):
+        return self._data["container"][:self._size]
+
+    @classmethod
+    def from_items(cls, items):
+        """Build the table for a whole inventory in one pass."""
+        columns = cls(capacity=max(64, len(items)))
+        rows = [columns._values(item) for item in items]
+
+        if rows:
+            for name, values in zip(cls.COLUMNS, zip(*rows)):
+                columns._data[name][:len(rows)] = values
+
+        columns.item_ids = [item["itemId"] for item in items]
+        columns._rows = {item_id: row for row, item_id in enumerate(columns.item_ids)}
+        columns._size = len(items)
+
+        return columns
+
+    def copy(self):
+        """Copy the table; the copy can be changed without touching this one."""
+        columns = ItemColumns(capacity=max(64, self._size))
+        for name, column in self._data.items():
+            columns._data[name][:self._size] = column[:self._size]
+
+        columns.item_ids = list(self.item_ids)
+        columns._rows = dict(self._rows)
+        columns._container_ids = list(self._container_ids)
+        columns._container_index = dict(self._container_index)
+        columns._size = self._size
+
+        return columns
+
+    def row(self, item_id):
+        return self._rows.get(item_id)
+
+    def container_id(self, index):
+        return self._container_ids[index] if index != NO_CONTAINER else None
+
+    def container_index(self, container_id):
+        """Index of a container in the container column, or NO_CONTAINER."""
+        return self._container_index.get(container_id, NO_CONTAINER)
+
+    @property
+    def container_ids(self):
+        return list(self._container_ids)
+
+    def set(self, item):
+        """Insert or refresh the row of an item."""
+        row = self._rows.get(item["itemId"])
+
+        if row is None:
+            if self._size == len(self._data["expiry"]):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._rows[item["itemId"]] = row
+            self.item_ids.append(item["itemId"])
+
+        for name, value in zip(self.COLUMNS, self._values(item)):
+            self._data[name][row] = value
+
+    def remove(self, item_id):
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return
+
+        last = self._size - 1
+        if row != last:
+            moved_id = self.item_ids[last]
+            for column in self._data.values():
+                column[row] = column[last]
+            self.item_ids[row] = moved_id
+            self._rows[moved_id] = row
+
+        self.item_ids.pop()
+        self._size -= 1
+
+    def volume_by_container(self):
+        """Stowed item volume per container index."""
+        stowed = self.container != NO_CONTAINER
+        return np.bincount(
+            self.container[stowed], weights=self.volume[stowed], minlength=len(self._container_ids)
+        )
+
+    def _grow(self):
+        for name, column in self._data.items():
+            grown = np.empty(len(column) * 2, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._data[name] = grown
+
+    def _values(self, item):
+        expiry = date_ordinal(item.get("expiryDate"))
+        uses = item.get("usesRemaining")
+        counted = uses is not None
+        if uses is None:
+            uses = item.get("usageLimit", 1)
+
+        container_id = item.get("containerId")
+        if container_id:
+            container = self._container_index.get(container_id)
+            if container is None:
+                container = len(self._container_ids)
+                self._container_index[container_id] = container
+                self._container_ids.append(container_id)
+        else:
+            container = NO_CONTAINER
+
+        return (
+            expiry if expiry is not None else NO_EXPIRY,
+            int(uses),
+            counted,
+            float(item.get("mass", 0) or 0),
+            float(item["width"]) * float(item["depth"]) * float(item["height"]),
+            int(item.get("priority", 50)),
+            container,
+        )
@@ -8,10 +8,41 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'cargo_stowage_secret_key')
 GENETIC_ALGORITHM_POPULATION_SIZE = 50
 GENETIC_ALGORITHM_GENERATIONS = 20
 GENETIC_ALGORITHM_MUTATION_RATE = 0.1
+GENETIC_ALGORITHM_WORKERS = int(os.getenv('GENETIC_ALGORITHM_WORKERS', os.cpu_count() or 1))
+# Full placements of more items than this run as a background job
+PLACEMENT_SYNC_MAX_ITEMS = int(os.getenv('PLACEMENT_SYNC_MAX_ITEMS', 500))
 
 GRASP_MAX_ITERATIONS = 100
 TABU_LIST_SIZE = 10
+GRASP_WORKERS = int(os.getenv('GRASP_WORKERS', os.cpu_count() or 1))
+
+# Monte Carlo forecasting
+FORECAST_WORKERS = int(os.getenv('FORECAST_WORKERS', os.cpu_count() or 1))
+FORECAST_BATCH_SIZE = 4000000  # simulated item-days per batch
+DEFAULT_FORECAST_TRAJECTORIES = 1000
+MAX_FORECAST_TRAJECTORIES = 100000
+
+# Background jobs
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+JOB_HISTORY_SIZE = 100
+
+# CSV import
+IMPORT_CHUNK_SIZE = 10000  # rows
+MAX_IMPORT_ERRORS = 1000  # rejected rows reported in full
+
+# Action logs
+LOG_PAGE_SIZE = 100
+MAX_LOG_PAGE_SIZE = 1000
+LOG_JOURNAL_DIR = os.getenv('LOG_JOURNAL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'logs'))
+LOG_SEGMENT_SIZE = 64 * 1024 * 1024  # bytes
+LOG_FLUSH_INTERVAL = 0.5  # seconds
+LOG_MEMORY_WINDOW = 100000  # logs
+LOG_EXPORT_CHUNK_SIZE = 1000  # logs per streamed chunk
 
 # System parameters
 DEFAULT_MAX_WEIGHT = 1000  # kg
+KNAPSACK_MASS_RESOLUTION = float(os.getenv('KNAPSACK_MASS_RESOLUTION', 0.1))  # kg
+BRANCH_AND_BOUND_MAX_NODES = 1000000
+DEFAULT_FPTAS_EPSILON = 0.1
+KNAPSACK_VOLUME_STATES = 10000
 DEFAULT_SYSTEM_DATE = "2025-04-06"  # ISO format
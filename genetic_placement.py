@@ -0,0 +1,392 @@
+import bisect
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+
+from config import (
+    GENETIC_ALGORITHM_POPULATION_SIZE,
+    GENETIC_ALGORITHM_GENERATIONS,
+    GENETIC_ALGORITHM_MUTATION_RATE,
+    GENETIC_ALGORITHM_WORKERS,
+)
+from algorithms.rearrangement import calculate_rearrangement_steps
+
+# Axis permutations of (width, depth, height) an item can be stowed in
+ORIENTATIONS = list(permutations(range(3)))
+
+# Orientations to try for each gene: the gene's own first, then the others
+ORIENTATION_ORDERS = [
+    [ORIENTATIONS[gene]] + [axes for k, axes in enumerate(ORIENTATIONS) if k != gene]
+    for gene in range(len(ORIENTATIONS))
+]
+
+# Fitness weights
+PLACED_ITEM_SCORE = 100
+PREFERRED_ZONE_BONUS = 0.5
+
+# Below this many gene evaluations a process pool costs more than it saves
+PARALLEL_THRESHOLD = 20000
+
+
+def hybrid_guillotine_cut_genetic_algorithm(items, containers, population_size=None,
+                                            generations=None, mutation_rate=None,
+                                            workers=None, seed=None, on_progress=None,
+                                            should_stop=None):
+    """
+    Implements the Hybrid Guillotine Cut + Genetic Algorithm for item placement.
+
+    Each chromosome is an item packing order plus a preferred orientation per
+    item. A chromosome is decoded by a guillotine-cut packer that stows items
+    one by one into free boxes, preferring the item's zone and the free box
+    closest to the open face. Fitness of the population is evaluated on a
+    process pool.
+
+    Args:
+        items: List of items to be placed
+        containers: List of available containers
+        population_size: Number of chromosomes per generation
+        generations: Number of generations to evolve
+        mutation_rate: Per-gene mutation probability
+        workers: Number of worker processes (1 evaluates in-process)
+        seed: Seed for the random number generator
+        on_progress: Optional callable (fraction done, partial result) called
+            after each generation with the best placements so far
+        should_stop: Optional callable; evolution stops early once it
+            returns True and the best placements so far are returned
+
+    Returns:
+        placements: List of placements (itemId, containerId, position)
+        rearrangements: Steps to move already stowed items to their new place
+    """
+    population_size = population_size or GENETIC_ALGORITHM_POPULATION_SIZE
+    generations = generations if generations is not None else GENETIC_ALGORITHM_GENERATIONS
+    mutation_rate = mutation_rate if mutation_rate is not None else GENETIC_ALGORITHM_MUTATION_RATE
+    workers = workers or GENETIC_ALGORITHM_WORKERS
+
+    if not items or not containers:
+        return [], []
+
+    rng = random.Random(seed)
+    n = len(items)
+
+    # Initial population: greedy seed (high priority first, then large items)
+    # plus mutated variants of it
+    greedy_order = sorted(
+        range(n),
+        key=lambda i: (-items[i].get("priority", 50), -_volume(items[i]))
+    )
+    greedy = (greedy_order, [0] * n)
+
+    population = [greedy]
+    while len(population) < population_size:
+        population.append(mutate(greedy, rng, max(mutation_rate, 0.05)))
+
+    decoder = GuillotineDecoder(items, containers)
+
+    if workers > 1 and population_size * n >= PARALLEL_THRESHOLD:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(items, containers)
+        )
+    else:
+        executor = None
+
+    try:
+        fitness = _evaluate_population(population, executor, workers, decoder.score)
+
+        for generation in range(generations):
+            if should_stop is not None and should_stop():
+                break
+
+            ranked = sorted(range(len(population)), key=lambda k: fitness[k], reverse=True)
+
+            # Elitism: carry the best chromosomes over unchanged
+            elite_count = max(1, population_size // 10)
+            next_population = [population[k] for k in ranked[:elite_count]]
+            next_fitness = [fitness[k] for k in ranked[:elite_count]]
+
+            offspring = []
+            while len(next_population) + len(offspring) < population_size:
+                parent_a = _tournament(population, fitness, rng)
+                parent_b = _tournament(population, fitness, rng)
+                child = order_crossover(parent_a, parent_b, rng)
+                offspring.append(mutate(child, rng, mutation_rate))
+
+            next_population.extend(offspring)
+            next_fitness.extend(_evaluate_population(offspring, executor, workers, decoder.score))
+
+            population = next_population
+            fitness = next_fitness
+
+            if on_progress is not None:
+                best_index = max(range(len(population)), key=lambda k: fitness[k])
+                on_progress((generation + 1) / generations, {
+                    "placements": decoder.decode(population[best_index])[0],
+                    "fitness": fitness[best_index]
+                })
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    best = population[max(range(len(population)), key=lambda k: fitness[k])]
+    placements, _ = decoder.decode(best)
+
+    # Rearrangements for items that were already stowed before this run
+    current_placements = [
+        {"itemId": item["itemId"], "containerId": item["containerId"], "position": item["position"]}
+        for item in items if item.get("containerId") and item.get("position")
+    ]
+    current_ids = set(p["itemId"] for p in current_placements)
+    rearrangements = calculate_rearrangement_steps(
+        current_placements, [p for p in placements if p["itemId"] in current_ids]
+    )
+
+    return placements, rearrangements
+
+
+def decode(chromosome, items, containers):
+    """
+    Pack items with the guillotine-cut heuristic in chromosome order.
+
+    Args:
+        chromosome: Tuple of (item order, orientation index per item)
+        items: List of items
+        containers: List of containers
+
+    Returns:
+        placements: List of placements for the items that fit
+        score: Fitness of the packing
+    """
+    return GuillotineDecoder(items, containers).decode(chromosome)
+
+
+class GuillotineDecoder:
+    """
+    Guillotine-cut packer for a fixed set of items and containers.
+
+    Everything that does not depend on the chromosome (item dimensions and
+    volumes, candidate containers per item, the smallest item dimension)
+    is prepared once per run rather than once per decode, and evaluating
+    fitness skips building the placement dicts.
+    """
+
+    def __init__(self, items, containers):
+        self.items = items
+        self.containers = containers
+
+        candidates_by_zone = _candidates_by_zone(containers)
+        all_candidates = list(range(len(containers)))
+
+        # (dims, sorted dims, volume, candidate containers) per item
+        self.shapes = []
+        for item in items:
+            dims = (item["width"], item["depth"], item["height"])
+            candidates = candidates_by_zone.get(item.get("preferredZone"), all_candidates)
+            self.shapes.append((dims, tuple(sorted(dims)), dims[0] * dims[1] * dims[2], candidates))
+
+        self.min_dim = min(shape[1][0] for shape in self.shapes)
+
+    def decode(self, chromosome):
+        """
+        Pack the items in chromosome order.
+
+        Returns:
+            placements: List of placements for the items that fit
+            score: Fitness of the packing
+        """
+        placements = []
+        score = self._pack(chromosome, placements)
+        return placements, score
+
+    def score(self, chromosome):
+        """Fitness of the packing, without building the placements."""
+        return self._pack(chromosome, None)
+
+    def _pack(self, chromosome, placements):
+        order, orientations = chromosome
+        items = self.items
+        containers = self.containers
+        shapes = self.shapes
+        min_dim = self.min_dim
+
+        # Free boxes per container, kept sorted by (depth, height, width) so the
+        # first fit is the one closest to the open face; boxes are stored with
+        # that key first so they sort as plain tuples. Boxes too thin for any
+        # item are dropped.
+        free_boxes = [[_free_box(0, 0, 0, c["width"], c["height"], c["depth"])] for c in containers]
+        free_volume = [c["width"] * c["height"] * c["depth"] for c in containers]
+
+        # Sorted dimensions of items that did not fit a container; any item at
+        # least as large in every sorted dimension cannot fit it either
+        failed = [[] for _ in containers]
+
+        score = 0
+
+        for i in order:
+            dims, sorted_dims, volume, candidates = shapes[i]
+
+            for c in candidates:
+                if volume > free_volume[c] or (failed[c] and _dominates_any(sorted_dims, failed[c])):
+                    continue
+
+                fit = _first_fit(free_boxes[c], dims, sorted_dims, orientations[i])
+                if fit is None:
+                    failed[c] = [f for f in failed[c] if not _dominates_any(f, [sorted_dims])]
+                    failed[c].append(sorted_dims)
+                    continue
+
+                box_index, (w, d, h) = fit
+                z, y, x, bw, bh, bd, _ = free_boxes[c].pop(box_index)
+                for box in ((x + w, y, z, bw - w, bh, bd),
+                            (x, y + h, z, w, bh - h, bd),
+                            (x, y, z + d, w, h, bd - d)):
+                    if box[3] >= min_dim and box[4] >= min_dim and box[5] >= min_dim:
+                        bisect.insort(free_boxes[c], _free_box(*box))
+                free_volume[c] -= volume
+
+                item = items[i]
+                container = containers[c]
+                if placements is not None:
+                    placements.append({
+                        "itemId": item["itemId"],
+                        "containerId": container["containerId"],
+                        "position": {
+                            "startCoordinates": {"width": x, "depth": z, "height": y},
+                            "endCoordinates": {"width": x + w, "depth": z + d, "height": y + h}
+                        }
+                    })
+
+                # Fitness: placed items, priority near the open face, zone match
+                accessibility = 1 - z / container["depth"] if container["depth"] else 1
+                zone_bonus = PREFERRED_ZONE_BONUS if container["zone"] == item.get("preferredZone") else 0
+                score += PLACED_ITEM_SCORE + item.get("priority", 50) * accessibility * (1 + zone_bonus)
+                break
+
+        return score
+
+
+def order_crossover(parent_a, parent_b, rng):
+    """
+    Order crossover (OX) on the packing order; orientations are inherited
+    per item from either parent.
+
+    Args:
+        parent_a: First parent chromosome
+        parent_b: Second parent chromosome
+        rng: Random number generator
+
+    Returns:
+        child: Child chromosome
+    """
+    order_a, orient_a = parent_a
+    order_b, orient_b = parent_b
+    n = len(order_a)
+
+    start, end = sorted(rng.sample(range(n + 1), 2)) if n > 1 else (0, n)
+    segment = order_a[start:end]
+    taken = set(segment)
+    rest = [i for i in order_b if i not in taken]
+    order = rest[:start] + segment + rest[start:]
+
+    orientations = [orient_a[i] if rng.random() < 0.5 else orient_b[i] for i in range(n)]
+
+    return order, orientations
+
+
+def mutate(chromosome, rng, mutation_rate):
+    """
+    Swap-mutate the packing order and re-roll orientations.
+
+    Args:
+        chromosome: Chromosome to mutate
+        rng: Random number generator
+        mutation_rate: Per-gene mutation probability
+
+    Returns:
+        mutant: New chromosome
+    """
+    order = list(chromosome[0])
+    orientations = list(chromosome[1])
+    n = len(order)
+
+    if n < 2:
+        return order, orientations
+
+    for i in range(n):
+        if rng.random() < mutation_rate:
+            j = rng.randrange(n)
+            order[i], order[j] = order[j], order[i]
+            orientations[order[i]] = rng.randrange(len(ORIENTATIONS))
+
+    return order, orientations
+
+
+def _free_box(x, y, z, width, height, depth):
+    return z, y, x, width, height, depth, tuple(sorted((width, height, depth)))
+
+
+def _first_fit(boxes, dims, sorted_dims, gene):
+    small, mid, large = sorted_dims
+
+    for box_index, box in enumerate(boxes):
+        box_small, box_mid, box_large = box[6]
+        if small > box_small or mid > box_mid or large > box_large:
+            continue
+
+        # The item fits in some orientation; prefer the gene's one
+        for axes in ORIENTATION_ORDERS[gene]:
+            w, d, h = dims[axes[0]], dims[axes[1]], dims[axes[2]]
+            if w <= box[3] and h <= box[4] and d <= box[5]:
+                return box_index, (w, d, h)
+
+    return None
+
+
+def _dominates_any(sorted_dims, failed_dims):
+    small, mid, large = sorted_dims
+    for f_small, f_mid, f_large in failed_dims:
+        if small >= f_small and mid >= f_mid and large >= f_large:
+            return True
+    return False
+
+
+def _candidates_by_zone(containers):
+    candidates = {}
+    for zone in set(c["zone"] for c in containers):
+        preferred = [k for k, c in enumerate(containers) if c["zone"] == zone]
+        others = [k for k, c in enumerate(containers) if c["zone"] != zone]
+        candidates[zone] = preferred + others
+    return candidates
+
+
+def _volume(item):
+    return item["width"] * item["depth"] * item["height"]
+
+
+def _tournament(population, fitness, rng, size=3):
+    best = max(rng.sample(range(len(population)), min(size, len(population))), key=lambda k: fitness[k])
+    return population[best]
+
+
+# Worker process state, set once per pool worker so chromosomes are the
+# only thing sent per task; never set in the serving process, where
+# concurrent placements each score with their own decoder
+_worker_decoder = None
+
+
+def _init_worker(items, containers):
+    global _worker_decoder
+    _worker_decoder = GuillotineDecoder(items, containers)
+
+
+def _evaluate(chromosome):
+    return _worker_decoder.score(chromosome)
+
+
+def _evaluate_population(population, executor, workers, score):
+    if executor is None:
+        return [score(chromosome) for chromosome in population]
+
+    chunksize = max(1, len(population) // (workers * 4))
+    return list(executor.map(_evaluate, population, chunksize=chunksize))
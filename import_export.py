@@ -1,14 +1,39 @@
 from flask import Blueprint, request, jsonify, current_app, send_file
 import csv
 import io
+import tempfile
 import uuid
 from datetime import datetime
 
+from services.import_service import item_import, container_import, ImportCancelled
+
 import_export_bp = Blueprint('import_export', __name__)
 
 
+# Kind -> (importer, store loader, log action, count key)
+IMPORTS = {
+    "items": (item_import, "load_items", "importItems", "itemsImported"),
+    "containers": (container_import, "load_containers", "importContainers", "containersImported"),
+}
+
+
 @import_export_bp.route('/import/items', methods=['POST'])
 def import_items():
+    return _import_csv("items")
+
+
+@import_export_bp.route('/import/containers', methods=['POST'])
+def import_containers():
+    return _import_csv("containers")
+
+
+def _import_csv(kind):
+    """
+    Import a CSV upload, streaming it into the store chunk by chunk.
+
+    With background=true the upload is spooled to a temporary file and
+    imported by a job, whose progress can be polled on /jobs/<jobId>.
+    """
     if 'file' not in request.files:
         return jsonify({"success": False, "error": "No file provided"}), 400
 
@@ -20,187 +45,90 @@ def import_items():
     if not file.filename.endswith('.csv'):
         return jsonify({"success": False, "error": "File must be a CSV"}), 400
 
-    items = []
-    errors = []
-    row_number = 0
-
-    try:
-        # Read CSV file
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.reader(stream)
-
-        # Get header row
-        header = next(csv_reader)
-        row_number = 1
-
-        # Map header indices
-        header_map = {
-            "itemId": header.index("Item ID") if "Item ID" in header else None,
-            "name": header.index("Name") if "Name" in header else None,
-            "width": header.index("Width (cm)") if "Width (cm)" in header else None,
-            "depth": header.index("Depth (cm)") if "Depth (cm)" in header else None,
-            "height": header.index("Height (cm)") if "Height (cm)" in header else None,
-            "mass": header.index("Mass (kg)") if "Mass (kg)" in header else None,
-            "priority": header.index("Priority (1-100)") if "Priority (1-100)" in header else None,
-            "expiryDate": header.index("Expiry Date (ISO Format)") if "Expiry Date (ISO Format)" in header else None,
-            "usageLimit": header.index("Usage Limit") if "Usage Limit" in header else None,
-            "preferredZone": header.index("Preferred Zone") if "Preferred Zone" in header else None
-        }
-
-        # Validate required headers
-        required_headers = ["itemId", "name", "width", "depth", "height"]
-        missing_headers = [header for header in required_headers if header_map[header] is None]
-
-        if missing_headers:
-            return jsonify({
-                "success": False,
-                "error": f"Missing required headers: {', '.join(missing_headers)}"
-            }), 400
+    importer, loader, action_type, count_key = IMPORTS[kind]
+    background = request.args.get('background', request.form.get('background', 'false')).lower() == 'true'
 
-        # Process each row
-        for row in csv_reader:
-            row_number += 1
+    if background:
+        handle = tempfile.TemporaryFile(suffix=".csv")
+        file.save(handle)
+        handle.seek(0)
+        stream = handle
+    else:
+        handle = None
+        stream = file.stream
 
-            try:
-                item = {
-                    "itemId": row[header_map["itemId"]],
-                    "name": row[header_map["name"]],
-                    "width": float(row[header_map["width"]]),
-                    "depth": float(row[header_map["depth"]]),
-                    "height": float(row[header_map["height"]])
-                }
-
-                # Optional fields
-                if header_map["mass"] is not None:
-                    item["mass"] = float(row[header_map["mass"]])
-
-                if header_map["priority"] is not None:
-                    item["priority"] = int(row[header_map["priority"]])
-
-                if header_map["expiryDate"] is not None and row[header_map["expiryDate"]]:
-                    item["expiryDate"] = row[header_map["expiryDate"]]
-
-                if header_map["usageLimit"] is not None:
-                    item["usageLimit"] = int(row[header_map["usageLimit"]])
-                    item["usesRemaining"] = int(row[header_map["usageLimit"]])
-
-                if header_map["preferredZone"] is not None:
-                    item["preferredZone"] = row[header_map["preferredZone"]]
-
-                items.append(item)
-
-            except (ValueError, IndexError) as e:
-                errors.append({
-                    "row": row_number,
-                    "message": str(e)
-                })
+    try:
+        csv_import = importer(stream)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        if handle is not None:
+            handle.close()
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    if background:
+        app = current_app._get_current_object()
+        job = current_app.config['JOBS'].submit(
+            action_type, run_import_job, app, kind, csv_import, handle,
+            details={"fileName": file.filename}
+        )
+        return jsonify({
+            "success": True,
+            "jobId": job.job_id,
+            "status": job.status
+        }), 202
 
-    except Exception as e:
+    # The store only changes once the whole file has been read
+    try:
+        getattr(current_app.config['STORE'], loader)(csv_import.records())
+    except (UnicodeDecodeError, csv.Error) as e:
         return jsonify({
             "success": False,
             "error": f"Error processing CSV: {str(e)}"
         }), 400
 
-    # Update in-memory database
-    current_app.config['ITEMS'] = items
-
-    # Log the import operation
-    timestamp = datetime.now().isoformat()
-    log_id = str(uuid.uuid4())
-    log = {
-        "logId": log_id,
-        "timestamp": timestamp,
-        "userId": "system",
-        "actionType": "importItems",
-        "details": {
-            "itemsImported": len(items),
-            "errors": len(errors)
-        }
-    }
-    current_app.config['LOGS'].append(log)
+    _log_import(current_app.config['LOGS'], action_type, count_key, csv_import)
 
     return jsonify({
         "success": True,
-        "itemsImported": len(items),
-        "errors": errors
+        count_key: csv_import.imported,
+        "errors": csv_import.errors,
+        "errorCount": csv_import.error_count
     })
 
 
-@import_export_bp.route('/import/containers', methods=['POST'])
-def import_containers():
-    if 'file' not in request.files:
-        return jsonify({"success": False, "error": "No file provided"}), 400
-
-    file = request.files['file']
-
-    if file.filename == '':
-        return jsonify({"success": False, "error": "No file selected"}), 400
+def run_import_job(job, app, kind, csv_import, handle):
+    """
+    Import a spooled CSV upload in the background.
 
-    if not file.filename.endswith('.csv'):
-        return jsonify({"success": False, "error": "File must be a CSV"}), 400
+    Args:
+        job: Job being run; its progress is the share of the file read
+        app: Flask application
+        kind: "items" or "containers"
+        csv_import: CsvImport over the spooled upload
+        handle: Temporary file holding the upload, closed when done
 
-    containers = []
-    errors = []
-    row_number = 0
+    Returns:
+        result: Number of records imported and the rejected rows, or None
+            if the job was cancelled (the store is then left unchanged)
+    """
+    _, loader, action_type, count_key = IMPORTS[kind]
 
     try:
-        # Read CSV file
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.reader(stream)
-
-        # Get header row
-        header = next(csv_reader)
-        row_number = 1
-
-        # Map header indices
-        header_map = {
-            "zone": header.index("Zone") if "Zone" in header else None,
-            "containerId": header.index("Container ID") if "Container ID" in header else None,
-            "width": header.index("Width(cm)") if "Width(cm)" in header else None,
-            "depth": header.index("Depth(cm)") if "Depth(cm)" in header else None,
-            "height": header.index("Height(height)") if "Height(height)" in header else None
-        }
-
-        # Validate required headers
-        required_headers = ["zone", "containerId", "width", "depth", "height"]
-        missing_headers = [header for header in required_headers if header_map[header] is None]
-
-        if missing_headers:
-            return jsonify({
-                "success": False,
-                "error": f"Missing required headers: {', '.join(missing_headers)}"
-            }), 400
-
-        # Process each row
-        for row in csv_reader:
-            row_number += 1
-
-            try:
-                container = {
-                    "zone": row[header_map["zone"]],
-                    "containerId": row[header_map["containerId"]],
-                    "width": float(row[header_map["width"]]),
-                    "depth": float(row[header_map["depth"]]),
-                    "height": float(row[header_map["height"]])
-                }
-
-                containers.append(container)
-
-            except (ValueError, IndexError) as e:
-                errors.append({
-                    "row": row_number,
-                    "message": str(e)
-                })
-
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": f"Error processing CSV: {str(e)}"
-        }), 400
+        with app.app_context():
+            getattr(app.config['STORE'], loader)(csv_import.records(job.report, job.cancelled))
+            _log_import(app.config['LOGS'], action_type, count_key, csv_import)
+    except ImportCancelled:
+        return None
+    finally:
+        handle.close()
+
+    return {
+        count_key: csv_import.imported,
+        "errors": csv_import.errors,
+        "errorCount": csv_import.error_count
+    }
 
-    # Update in-memory database
-    current_app.config['CONTAINERS'] = containers
 
+def _log_import(logs, action_type, count_key, csv_import):
     # Log the import operation
     timestamp = datetime.now().isoformat()
     log_id = str(uuid.uuid4())
@@ -208,24 +136,18 @@ def import_containers():
         "logId": log_id,
         "timestamp": timestamp,
         "userId": "system",
-        "actionType": "importContainers",
+        "actionType": action_type,
         "details": {
-            "containersImported": len(containers),
-            "errors": len(errors)
+            count_key: csv_import.imported,
+            "errors": csv_import.error_count
         }
     }
-    current_app.config['LOGS'].append(log)
-
-    return jsonify({
-        "success": True,
-        "containersImported": len(containers),
-        "errors": errors
-    })
+    logs.append(log)
 
 
 @import_export_bp.route('/export/arrangement', methods=['GET'])
 def export_arrangement():
-    items = current_app.config.get('ITEMS', [])
+    items = current_app.config['STORE'].items()
 
     # Create CSV content
     output = io.StringIO()
@@ -236,7 +158,7 @@ def export_arrangement():
 
     # Write items
     for item in items:
-        if "containerId" in item and "position" in item:
+        if item.get("containerId") and item.get("position"):
             coordinates = (
                 f"({item['position']['startCoordinates']['width']},"
                 f"{item['position']['startCoordinates']['depth']},"
@@ -260,7 +182,7 @@ def export_arrangement():
         "userId": "system",
         "actionType": "exportArrangement",
         "details": {
-            "itemsExported": sum(1 for item in items if "containerId" in item and "position" in item)
+            "itemsExported": sum(1 for item in items if item.get("containerId") and item.get("position"))
         }
     }
     current_app.config['LOGS'].append(log)
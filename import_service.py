@@ -0,0 +1,195 @@
+import codecs
+import csv
+import itertools
+import os
+
+from config import IMPORT_CHUNK_SIZE, MAX_IMPORT_ERRORS
+
+# Field -> CSV header, for the item and container manifests
+ITEM_HEADERS = {
+    "itemId": "Item ID",
+    "name": "Name",
+    "width": "Width (cm)",
+    "depth": "Depth (cm)",
+    "height": "Height (cm)",
+    "mass": "Mass (kg)",
+    "priority": "Priority (1-100)",
+    "expiryDate": "Expiry Date (ISO Format)",
+    "usageLimit": "Usage Limit",
+    "preferredZone": "Preferred Zone"
+}
+ITEM_REQUIRED = ["itemId", "name", "width", "depth", "height"]
+
+CONTAINER_HEADERS = {
+    "zone": "Zone",
+    "containerId": "Container ID",
+    "width": "Width(cm)",
+    "depth": "Depth(cm)",
+    "height": "Height(height)"
+}
+CONTAINER_REQUIRED = ["zone", "containerId", "width", "depth", "height"]
+
+
+class ImportCancelled(Exception):
+    """Raised while reading an import whose job was cancelled."""
+
+
+class CsvImport:
+    """
+    Streaming import of a CSV upload.
+
+    The upload is decoded and parsed as it is read, a chunk of rows at a
+    time: each chunk is converted, the valid records are handed to the store
+    and the chunk is dropped before the next one is read, so the raw file
+    and its decoded text are never held in memory. The header is read and
+    checked up front, and the store only swaps the records in once the
+    whole file has been read, so a bad file leaves it unchanged.
+    """
+
+    def __init__(self, stream, headers, required, parse_row, chunk_size=None):
+        """
+        Args:
+            stream: Binary stream of the upload
+            headers: Dict of field -> CSV header
+            required: Fields whose header must be present
+            parse_row: Callable parse_row(row, columns) returning a record,
+                raising ValueError or IndexError for an invalid row
+            chunk_size: Rows per chunk
+
+        Raises:
+            ValueError: If the file is empty or required headers are missing
+        """
+        self._stream = stream
+        self._size = _stream_size(stream)
+        # Lines are split on the raw bytes and decoded one at a time
+        self._reader = csv.reader(codecs.iterdecode(stream, "utf8"))
+        self._parse_row = parse_row
+        self._chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+
+        header = next(self._reader, None)
+        if header is None:
+            raise ValueError("Empty CSV file")
+
+        # Header positions, looked up once
+        positions = {name: k for k, name in reversed(list(enumerate(header)))}
+        self.columns = {field: positions.get(name) for field, name in headers.items()}
+
+        missing_headers = [field for field in required if self.columns[field] is None]
+        if missing_headers:
+            raise ValueError(f"Missing required headers: {', '.join(missing_headers)}")
+
+        self.rows = 1  # rows read, including the header
+        self.imported = 0
+        self.errors = []
+        self.error_count = 0
+
+    def records(self, on_progress=None, should_stop=None):
+        """
+        Yield the valid records, chunk by chunk.
+
+        Args:
+            on_progress: Optional callback on_progress(fraction, summary),
+                called after every chunk
+            should_stop: Optional callback; once it returns True the
+                import raises ImportCancelled after the current chunk
+
+        Raises:
+            ImportCancelled: If should_stop returned True
+        """
+        while True:
+            if should_stop and should_stop():
+                raise ImportCancelled()
+
+            chunk = list(itertools.islice(self._reader, self._chunk_size))
+            if not chunk:
+                break
+
+            records = []
+            for row in chunk:
+                self.rows += 1
+                try:
+                    records.append(self._parse_row(row, self.columns))
+                except (ValueError, IndexError) as e:
+                    self.error_count += 1
+                    if len(self.errors) < MAX_IMPORT_ERRORS:
+                        self.errors.append({"row": self.rows, "message": str(e)})
+
+            self.imported += len(records)
+            yield from records
+
+            if on_progress:
+                on_progress(self.progress(), self.summary())
+
+    def progress(self):
+        """Share of the upload read so far, if its size is known."""
+        if not self._size:
+            return None
+        try:
+            return min(1.0, self._stream.tell() / self._size)
+        except (OSError, ValueError):
+            return None
+
+    def summary(self):
+        return {
+            "rowsProcessed": self.rows - 1,
+            "imported": self.imported,
+            "errorCount": self.error_count
+        }
+
+
+def parse_item_row(row, columns):
+    item = {
+        "itemId": row[columns["itemId"]],
+        "name": row[columns["name"]],
+        "width": float(row[columns["width"]]),
+        "depth": float(row[columns["depth"]]),
+        "height": float(row[columns["height"]])
+    }
+
+    # Optional fields
+    if columns["mass"] is not None:
+        item["mass"] = float(row[columns["mass"]])
+
+    if columns["priority"] is not None:
+        item["priority"] = int(row[columns["priority"]])
+
+    if columns["expiryDate"] is not None and row[columns["expiryDate"]]:
+        item["expiryDate"] = row[columns["expiryDate"]]
+
+    if columns["usageLimit"] is not None:
+        item["usageLimit"] = int(row[columns["usageLimit"]])
+        item["usesRemaining"] = int(row[columns["usageLimit"]])
+
+    if columns["preferredZone"] is not None:
+        item["preferredZone"] = row[columns["preferredZone"]]
+
+    return item
+
+
+def parse_container_row(row, columns):
+    return {
+        "zone": row[columns["zone"]],
+        "containerId": row[columns["containerId"]],
+        "width": float(row[columns["width"]]),
+        "depth": float(row[columns["depth"]]),
+        "height": float(row[columns["height"]])
+    }
+
+
+def item_import(stream, chunk_size=None):
+    return CsvImport(stream, ITEM_HEADERS, ITEM_REQUIRED, parse_item_row, chunk_size)
+
+
+def container_import(stream, chunk_size=None):
+    return CsvImport(stream, CONTAINER_HEADERS, CONTAINER_REQUIRED, parse_container_row, chunk_size)
+
+
+def _stream_size(stream):
+    try:
+        position = stream.tell()
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
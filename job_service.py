@@ -0,0 +1,170 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobConflict(Exception):
+    """The store changed while the job ran, so its result no longer applies."""
+
+
+class Job:
+    """A long-running solve with progress, partial results and cancellation."""
+
+    def __init__(self, job_type, details=None):
+        self.job_id = str(uuid.uuid4())
+        self.job_type = job_type
+        self.details = details or {}
+        self.status = QUEUED
+        self.progress = 0.0
+        self.partial_result = None
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def report(self, progress, partial_result=None):
+        """Progress callback for the solvers."""
+        with self._lock:
+            self.progress = progress
+            if partial_result is not None:
+                self.partial_result = partial_result
+
+    def cancelled(self):
+        """Stop callback for the solvers."""
+        return self._cancel.is_set()
+
+    def to_dict(self, include_results=True):
+        with self._lock:
+            data = {
+                "jobId": self.job_id,
+                "type": self.job_type,
+                "status": self.status,
+                "progress": self.progress,
+                "details": self.details,
+                "createdAt": self.created_at,
+                "startedAt": self.started_at,
+                "finishedAt": self.finished_at,
+                "error": self.error
+            }
+
+            if include_results:
+                data["partialResult"] = self.partial_result
+                data["result"] = self.result
+
+            return data
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool.
+
+    Only `max_workers` jobs run at once, the rest wait in the queue, so
+    request threads stay free for interactive endpoints. Finished jobs are
+    kept for polling until `history_size` newer jobs have finished.
+    """
+
+    def __init__(self, max_workers, history_size=100):
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()  # jobId -> Job, in submission order
+        self._lock = threading.Lock()
+
+    def submit(self, job_type, fn, *args, details=None):
+        """
+        Queue a job.
+
+        Args:
+            job_type: Name of the job type, e.g. "placement"
+            fn: Callable fn(job, *args) returning the job result
+            *args: Arguments for fn
+            details: Request summary shown when polling
+
+        Returns:
+            job: The queued Job
+        """
+        job = Job(job_type, details)
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._evict()
+
+        job.future = self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. Queued jobs never start; running jobs stop at the
+        solver's next checkpoint and keep their partial result.
+
+        Returns:
+            job: The job, or None if it does not exist
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+
+        job._cancel.set()
+
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+
+        return job
+
+    def _run(self, job, fn, args):
+        if job.cancelled():
+            self._finish(job, CANCELLED)
+            return
+
+        with job._lock:
+            job.status = RUNNING
+            job.started_at = datetime.now().isoformat()
+
+        try:
+            result = fn(job, *args)
+        except Exception as e:
+            with job._lock:
+                job.error = str(e)
+            self._finish(job, FAILED)
+            return
+
+        if job.cancelled():
+            self._finish(job, CANCELLED)
+            return
+
+        with job._lock:
+            job.result = result
+            job.progress = 1.0
+        self._finish(job, COMPLETED)
+
+    def _finish(self, job, status):
+        with job._lock:
+            if job.status in FINISHED_STATES:
+                return
+            job.status = status
+            job.finished_at = datetime.now().isoformat()
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del self._jobs[job_id]
@@ -0,0 +1,142 @@
+from flask import Blueprint, request, jsonify, current_app
+from algorithms.rearrangement import grasp_tabu_search_rearrangement
+from api.placement import run_placement_job
+from config import GRASP_WORKERS
+import uuid
+from datetime import datetime
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+@jobs_bp.route('/jobs', methods=['POST'])
+def submit_job():
+    data = request.get_json()
+
+    if not data:
+        return jsonify({"success": False, "error": "No data provided"}), 400
+
+    job_type = data.get('type')
+    user_id = data.get('userId', 'system')
+    app = current_app._get_current_object()
+    jobs = current_app.config['JOBS']
+
+    if job_type == 'placement':
+        items = data.get('items', [])
+        containers = data.get('containers', [])
+
+        # Verify required data
+        if not items or not containers:
+            return jsonify({"success": False, "error": "Items and containers are required"}), 400
+
+        # The result replaces the inventory, so it is only stored if nothing changed meanwhile
+        base_version = current_app.config['STORE'].version()
+
+        job = jobs.submit(
+            job_type, run_placement_job, app, items, containers, data.get('seed'), base_version,
+            details={"numItems": len(items), "numContainers": len(containers)}
+        )
+
+    elif job_type == 'rearrangement':
+        time_budget = data.get('timeBudget')
+        if time_budget is not None and time_budget <= 0:
+            return jsonify({"success": False, "error": "Time budget must be greater than 0"}), 400
+
+        job = jobs.submit(
+            job_type, run_rearrangement_job, app, time_budget, data.get('seed'),
+            details={"timeBudget": time_budget}
+        )
+
+    else:
+        return jsonify({"success": False, "error": "Job type must be 'placement' or 'rearrangement'"}), 400
+
+    # Log the job submission
+    timestamp = datetime.now().isoformat()
+    log_id = str(uuid.uuid4())
+    log = {
+        "logId": log_id,
+        "timestamp": timestamp,
+        "userId": user_id,
+        "actionType": "jobSubmitted",
+        "details": {
+            "jobId": job.job_id,
+            "jobType": job_type
+        }
+    }
+    current_app.config['LOGS'].append(log)
+
+    return jsonify({
+        "success": True,
+        "jobId": job.job_id,
+        "status": job.status
+    }), 202
+
+
+@jobs_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    jobs = current_app.config['JOBS']
+
+    return jsonify({
+        "success": True,
+        "jobs": [job.to_dict(include_results=False) for job in jobs.jobs()]
+    })
+
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = current_app.config['JOBS'].get(job_id)
+
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+
+    return jsonify({
+        "success": True,
+        "job": job.to_dict()
+    })
+
+
+@jobs_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = current_app.config['JOBS'].cancel(job_id)
+
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+
+    return jsonify({
+        "success": True,
+        "job": job.to_dict(include_results=False)
+    })
+
+
+def run_rearrangement_job(job, app, time_budget, seed):
+    """
+    Search for a better arrangement of the stowed items in the background.
+
+    The result is a recommendation; the stored arrangement is not changed.
+
+    Args:
+        job: Job being run
+        app: Flask application
+        time_budget: Wall-clock budget in seconds, or None
+        seed: Seed for the GRASP restarts
+
+    Returns:
+        result: Recommended placements and the steps to get there
+    """
+    store = app.config['STORE']
+    with store.lock:
+        items = store.items()
+        containers = store.containers()
+    current_placements = [
+        {"itemId": item["itemId"], "containerId": item["containerId"], "position": item["position"]}
+        for item in items if item.get("containerId") and item.get("position")
+    ]
+
+    placements, rearrangements = grasp_tabu_search_rearrangement(
+        items, containers, current_placements, workers=GRASP_WORKERS, time_budget=time_budget, seed=seed,
+        on_progress=job.report, should_stop=job.cancelled
+    )
+
+    return {
+        "placements": placements,
+        "rearrangements": rearrangements
+    }
@@ -0,0 +1,389 @@
+import heapq
+import json
+import os
+import threading
+
+import numpy as np
+
+from models.log_rollup import ActivityRollup
+
+# Fields whose values are recorded per segment, so queries can skip segments
+SEGMENT_VALUE_FIELDS = ("itemId", "userId", "actionType")
+
+# Sorted per-segment time index: one record per log
+INDEX_DTYPE = np.dtype([("epoch", np.float64), ("seq", np.int64), ("offset", np.int64)])
+
+# Index entries copied out of the active segment per step of a scan
+SCAN_CHUNK = 1000
+
+
+class LogJournal:
+    """
+    Append-only journal of action logs on disk.
+
+    Logs are written as JSON lines ([epoch, seq, log]) to numbered segment
+    files by a background thread that batches appends and fsyncs once per
+    batch, so request handlers never wait on the disk. A segment is sealed
+    once it reaches segment_size bytes: its time index, the (epoch, seq,
+    offset) of every record sorted by time, is saved next to it and memory
+    mapped, together with the set of itemId, userId and actionType values
+    it holds and its activity rollup counters. Time-range queries binary
+    search the index of each segment that overlaps the range and read only
+    the matching records.
+    """
+
+    def __init__(self, directory, segment_size, flush_interval):
+        self._directory = directory
+        self._segment_size = segment_size
+        self._flush_interval = flush_interval
+
+        self._segments = []  # oldest first; the last one is active
+        self._pending = []  # (key, log, encoded line) waiting for the writer
+        self._lock = threading.Lock()  # guards the segments and their indexes
+        self._cond = threading.Condition()  # guards the pending batch
+        self._closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+        self._written_seq = self.last_seq()
+        self._queued_seq = self._written_seq  # last sequence number appended
+
+        self._writer = threading.Thread(target=self._run, name="log-journal-writer", daemon=True)
+        self._writer.start()
+
+    # Appending
+
+    def append(self, key, log):
+        """Queue a log for writing; key is its (epoch, seq)."""
+        line = json.dumps([key[0], key[1], log], separators=(",", ":")).encode("utf8") + b"\n"
+        with self._cond:
+            if self._closed:
+                raise ValueError("Log journal is closed")
+            self._pending.append((key, log, line))
+            self._queued_seq = max(self._queued_seq, key[1])
+            self._cond.notify()
+
+    def written_seq(self):
+        """Sequence number of the last log written and fsynced."""
+        return self._written_seq
+
+    def last_seq(self):
+        """Largest sequence number in the journal, or -1 if it is empty."""
+        return max((segment.max_seq for segment in self._segments), default=-1)
+
+    def last_key(self):
+        """Latest (epoch, seq) in the journal, or None if it is empty."""
+        return max((segment.max_key for segment in self._segments if segment.count), default=None)
+
+    def rollup(self):
+        """Activity rollup of every log in the journal."""
+        rollup = ActivityRollup()
+        with self._lock:
+            for segment in self._segments:
+                rollup.merge(segment.rollup)
+        return rollup
+
+    def flush(self):
+        """Wait until everything appended so far is on disk."""
+        # Counts the batch the writer has already taken as well as the pending one
+        with self._cond:
+            target = self._queued_seq
+        while self._written_seq < target and self._writer.is_alive():
+            with self._cond:
+                self._cond.notify()
+                self._cond.wait(self._flush_interval)
+
+    def close(self):
+        """Write the remaining logs and stop the writer."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._pending and not self._closed:
+                    self._cond.wait(self._flush_interval)
+                batch = self._pending
+                self._pending = []
+                closed = self._closed
+
+            if batch:
+                self._write(batch)
+                with self._cond:
+                    self._cond.notify_all()
+
+            if closed and not batch:
+                return
+
+    def _write(self, batch):
+        segment = self._segments[-1]
+
+        with open(segment.path, "ab") as f:
+            offset = f.tell()
+            entries = []
+            for key, log, line in batch:
+                f.write(line)
+                entries.append((key, log, offset))
+                offset += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._lock:
+            for key, log, entry_offset in entries:
+                segment.add(key, log, entry_offset)
+            segment.size = offset
+            if segment.size >= self._segment_size:
+                segment.seal()
+                self._segments.append(_Segment(self._segment_path(segment.number + 1), segment.number + 1))
+
+        self._written_seq = max(self._written_seq, max(key[1] for key, _, _ in batch))
+
+    # Reading
+
+    def scan(self, start=None, end=None, before=None, **filters):
+        """
+        Yield logs newest first, read from disk.
+
+        Args:
+            start: Earliest epoch, inclusive
+            end: Latest epoch, inclusive
+            before: Only logs with a (epoch, seq) key before this one
+            **filters: Field values to match, by API field name
+
+        Yields:
+            key, log: The (epoch, seq) key and the log
+        """
+        lo = (start, -1) if start is not None else None
+        hi = (end, float("inf")) if end is not None else None
+        if before is not None and (hi is None or before < hi):
+            hi = before
+
+        with self._lock:
+            segments = [
+                segment for segment in self._segments
+                if segment.overlaps(lo, hi) and segment.may_contain(filters)
+            ]
+            # Sealed indexes are memory-mapped views; the active segment's
+            # entries keep changing, so they are copied a chunk at a time
+            runs = [
+                _reversed_entries(segment, segment.entries(lo, hi)) if segment.sealed
+                else self._active_entries(segment, lo, hi)
+                for segment in segments
+            ]
+
+        files = {}
+        try:
+            for epoch, seq, offset, segment in heapq.merge(*runs, reverse=True):
+                f = files.get(segment.number)
+                if f is None:
+                    f = files[segment.number] = open(segment.path, "rb")
+                f.seek(offset)
+                _, _, log = json.loads(f.readline())
+
+                if all(log.get(field) == value for field, value in filters.items()):
+                    yield (epoch, seq), log
+        finally:
+            for f in files.values():
+                f.close()
+
+    def _active_entries(self, segment, lo, hi):
+        # Newest first, re-searching below the last chunk each time, so
+        # records added (or the segment being sealed) mid-scan are handled
+        upper = hi
+        while True:
+            with self._lock:
+                chunk = segment.entries(lo, upper, SCAN_CHUNK)
+                chunk = [(float(epoch), int(seq), int(offset)) for epoch, seq, offset in chunk]
+
+            for epoch, seq, offset in reversed(chunk):
+                yield epoch, seq, offset, segment
+
+            if len(chunk) < SCAN_CHUNK:
+                return
+            upper = chunk[0][:2]
+
+    def __len__(self):
+        return sum(segment.count for segment in self._segments)
+
+    # Recovery
+
+    def _recover(self):
+        numbers = sorted(
+            int(name[len("segment-"):-len(".jsonl")])
+            for name in os.listdir(self._directory)
+            if name.startswith("segment-") and name.endswith(".jsonl")
+        )
+
+        for k, number in enumerate(numbers):
+            segment = _Segment(self._segment_path(number), number)
+            if not segment.load():
+                segment.rebuild()
+                # Only the last segment is still being written to
+                if k < len(numbers) - 1:
+                    segment.seal()
+            self._segments.append(segment)
+
+        if not self._segments or self._segments[-1].sealed:
+            number = self._segments[-1].number + 1 if self._segments else 1
+            self._segments.append(_Segment(self._segment_path(number), number))
+
+    def _segment_path(self, number):
+        return os.path.join(self._directory, f"segment-{number:08d}.jsonl")
+
+
+class _Segment:
+    def __init__(self, path, number):
+        self.path = path
+        self.number = number
+        self.size = 0
+        self.count = 0
+        self.min_key = None
+        self.max_key = None
+        self.max_seq = -1
+        self.values = {field: set() for field in SEGMENT_VALUE_FIELDS}
+        self.rollup = ActivityRollup()
+        self.sealed = False
+        self._entries = []  # sorted (epoch, seq, offset) while active
+        self._index = None  # memory-mapped INDEX_DTYPE array once sealed
+
+    def add(self, key, log, offset):
+        entry = (key[0], key[1], offset)
+        if not self._entries or entry > self._entries[-1]:
+            self._entries.append(entry)
+        else:
+            self._entries.insert(_bisect(self._entries, entry), entry)
+
+        for field, values in self.values.items():
+            if log.get(field) is not None:
+                values.add(log[field])
+        self.rollup.add(log)
+
+        self.count += 1
+        self.min_key = key if self.min_key is None else min(self.min_key, key)
+        self.max_key = key if self.max_key is None else max(self.max_key, key)
+        self.max_seq = max(self.max_seq, key[1])
+
+    def overlaps(self, lo, hi):
+        if not self.count:
+            return False
+        return (lo is None or self.max_key >= lo) and (hi is None or self.min_key < hi)
+
+    def may_contain(self, filters):
+        return all(
+            value in self.values[field] for field, value in filters.items() if field in self.values
+        )
+
+    def entries(self, lo, hi, limit=None):
+        """
+        (epoch, seq, offset) of the records with lo <= key < hi, oldest
+        first; with a limit, only the newest limit of them.
+        """
+        if self._index is None:
+            start = _bisect(self._entries, lo) if lo is not None else 0
+            end = _bisect(self._entries, hi) if hi is not None else len(self._entries)
+        else:
+            start = _search(self._index, lo) if lo is not None else 0
+            end = _search(self._index, hi) if hi is not None else len(self._index)
+
+        if limit is not None:
+            start = max(start, end - limit)
+        return (self._entries if self._index is None else self._index)[start:end]
+
+    def seal(self):
+        """Save the time index and value sets and memory map the index."""
+        index = np.array(self._entries, dtype=INDEX_DTYPE)
+        _atomic_write(self.path[:-len(".jsonl")] + ".idx", lambda f: np.save(f, index))
+        _atomic_write(self.path[:-len(".jsonl")] + ".meta", lambda f: f.write(json.dumps({
+            "size": self.size,
+            "count": self.count,
+            "minKey": self.min_key,
+            "maxKey": self.max_key,
+            "maxSeq": self.max_seq,
+            "values": {field: sorted(values, key=str) for field, values in self.values.items()},
+            "rollup": self.rollup.to_dict()
+        }).encode("utf8")))
+
+        self._entries = []
+        self._index = np.load(self.path[:-len(".jsonl")] + ".idx", mmap_mode="r")
+        self.sealed = True
+
+    def load(self):
+        """Load a sealed segment's index; False if it was never sealed."""
+        base = self.path[:-len(".jsonl")]
+        if not (os.path.exists(base + ".idx") and os.path.exists(base + ".meta")):
+            return False
+
+        with open(base + ".meta", "rb") as f:
+            meta = json.loads(f.read())
+
+        self.size = meta["size"]
+        self.count = meta["count"]
+        self.min_key = tuple(meta["minKey"]) if meta["minKey"] else None
+        self.max_key = tuple(meta["maxKey"]) if meta["maxKey"] else None
+        self.max_seq = meta["maxSeq"]
+        self.values = {field: set(values) for field, values in meta["values"].items()}
+        self.rollup = ActivityRollup.from_dict(meta["rollup"])
+        self._index = np.load(base + ".idx", mmap_mode="r")
+        self.sealed = True
+        return True
+
+    def rebuild(self):
+        """
+        Rebuild the index by reading the records. Only an unterminated last
+        line is a torn write and is cut off; a damaged line before it is
+        skipped, so the records after it are kept.
+        """
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    epoch, seq, log = json.loads(line)
+                except (TypeError, ValueError):
+                    offset += len(line)
+                    continue
+                self.add((epoch, seq), log, offset)
+                offset += len(line)
+
+        if os.path.getsize(self.path) > offset:
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+                os.fsync(f.fileno())
+        self.size = offset
+
+
+def _reversed_entries(segment, entries):
+    for k in range(len(entries) - 1, -1, -1):
+        epoch, seq, offset = entries[k]
+        yield float(epoch), int(seq), int(offset), segment
+
+
+def _bisect(entries, key):
+    # First entry whose (epoch, seq) is not before key
+    lo, hi = 0, len(entries)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if entries[mid][:2] < tuple(key):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _search(index, key):
+    # _bisect over a sealed index: search the epochs, then step over ties by seq
+    k = int(np.searchsorted(index["epoch"], key[0], side="left"))
+    while k < len(index) and index["epoch"][k] == key[0] and index["seq"][k] < key[1]:
+        k += 1
+    return k
+
+
+def _atomic_write(path, write):
+    with open(path + ".tmp", "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
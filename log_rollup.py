@@ -0,0 +1,92 @@
+class ActivityRollup:
+    """
+    Running counts of logs per actionType and grouping value.
+
+    Every log added bumps one counter per dimension: its userId,
+    containerId, the hour and day of its timestamp and its actionType, each
+    kept per actionType. Rollups such as retrievals per hour or searches per
+    user are then read straight from the counters instead of rescanning the
+    logs. Values are counted as strings, the form they take in JSON, so
+    counters read back from disk merge with the ones kept in memory.
+    """
+
+    DIMENSIONS = ("actionType", "userId", "containerId", "hour", "day")
+
+    def __init__(self):
+        self._counts = {dimension: {} for dimension in self.DIMENSIONS}  # dimension -> actionType -> value -> count
+
+    def add(self, log):
+        action_type = _key(log.get("actionType"))
+        for dimension, counts in self._counts.items():
+            value = _group_value(log, dimension)
+            if value is not None:
+                by_value = counts.setdefault(action_type, {})
+                by_value[value] = by_value.get(value, 0) + 1
+
+    def merge(self, other):
+        for dimension, counts in other._counts.items():
+            for action_type, by_value in counts.items():
+                merged = self._counts[dimension].setdefault(action_type, {})
+                for value, count in by_value.items():
+                    merged[value] = merged.get(value, 0) + count
+
+    def counts(self, dimension, action_type=None, start=None, end=None):
+        """
+        Count logs per value of a dimension.
+
+        Args:
+            dimension: One of DIMENSIONS
+            action_type: Only count logs of this action type
+            start: First time bucket to include (hour and day only)
+            end: Last time bucket to include (hour and day only)
+
+        Returns:
+            counts: Dict of value -> number of logs
+        """
+        if action_type is not None:
+            totals = dict(self._counts[dimension].get(action_type, {}))
+        else:
+            totals = {}
+            for by_value in self._counts[dimension].values():
+                for value, count in by_value.items():
+                    totals[value] = totals.get(value, 0) + count
+
+        if start is not None or end is not None:
+            totals = {
+                bucket: count for bucket, count in totals.items()
+                if (start is None or bucket >= start) and (end is None or bucket <= end)
+            }
+
+        return totals
+
+    def to_dict(self):
+        return {
+            dimension: [[action_type, by_value] for action_type, by_value in counts.items()]
+            for dimension, counts in self._counts.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        rollup = cls()
+        for dimension, counts in data.items():
+            if dimension in rollup._counts:
+                rollup._counts[dimension] = {_key(action_type): dict(by_value) for action_type, by_value in counts}
+        return rollup
+
+
+def time_bucket(timestamp, dimension):
+    """Hour ("2025-04-06T13") or day ("2025-04-06") bucket of an ISO timestamp."""
+    length = 13 if dimension == "hour" else 10
+    if not isinstance(timestamp, str) or len(timestamp) < length:
+        return None
+    return timestamp[:length]
+
+
+def _group_value(log, dimension):
+    if dimension in ("hour", "day"):
+        return time_bucket(log.get("timestamp"), dimension)
+    return _key(log.get(dimension))
+
+
+def _key(value):
+    return str(value) if value is not None else None
@@ -0,0 +1,250 @@
+import bisect
+import itertools
+import threading
+from datetime import datetime
+
+from models.log_rollup import ActivityRollup
+
+# Logs copied out of memory per step of a scan
+SCAN_CHUNK = 1000
+
+
+def log_epoch(timestamp):
+    """
+    Convert an ISO timestamp to seconds since the epoch.
+
+    Returns:
+        epoch: Seconds since the epoch, or 0.0 if the timestamp is not valid
+    """
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class LogStore:
+    """
+    Store for action logs, kept in timestamp order.
+
+    Timestamps are parsed once, on append, into (epoch, sequence) keys; the
+    sequence number breaks ties between logs with the same timestamp. Next
+    to the sorted key list there is a sorted key list per itemId, userId and
+    actionType value, so a filtered query walks the smallest matching index
+    over a time range found by binary search instead of scanning every log.
+
+    With a LogJournal every log is also written to disk and only the newest
+    memory_window logs are kept in memory; older ones are evicted once the
+    journal has written them and are read back from the journal, so a query
+    pages through memory first and continues on disk. Activity rollup
+    counters are updated on every append and seeded from the journal's
+    per-segment counters, so they cover the whole history. Appending
+    behaves like the plain list it replaces, so handlers can keep calling
+    append and extend.
+    """
+
+    INDEXED_FIELDS = ("itemId", "userId", "actionType")
+
+    def __init__(self, journal=None, memory_window=None):
+        self._keys = []  # sorted (epoch, seq)
+        self._logs = {}  # seq -> log
+        self._indexes = {field: {} for field in self.INDEXED_FIELDS}  # field -> value -> sorted keys
+        self._lock = threading.Lock()
+
+        self._journal = journal
+        self._memory_window = memory_window
+        self._evicted_until = None  # latest key only served from the journal
+        self._evicted = 0
+
+        if journal is not None:
+            # Logs from earlier runs stay on disk
+            self._rollup = journal.rollup()
+            self._evicted_until = journal.last_key()
+            self._evicted = len(journal)
+            self._seq = itertools.count(journal.last_seq() + 1)
+        else:
+            self._rollup = ActivityRollup()
+            self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._keys) + self._evicted
+
+    def append(self, log):
+        epoch = log_epoch(log.get("timestamp"))
+
+        with self._lock:
+            key = (epoch, next(self._seq))
+            if self._journal is not None:
+                self._journal.append(key, log)
+            self._rollup.add(log)
+
+            # Older than what was evicted: it is only read back from the journal
+            if self._evicted_until is not None and key <= self._evicted_until:
+                self._evicted += 1
+                return
+
+            self._logs[key[1]] = log
+            _insert(self._keys, key)
+
+            for field, index in self._indexes.items():
+                value = log.get(field)
+                if value is not None:
+                    _insert(index.setdefault(value, []), key)
+
+            if self._memory_window is not None and len(self._keys) > self._memory_window:
+                self._evict()
+
+    def extend(self, logs):
+        for log in logs:
+            self.append(log)
+
+    def query(self, start=None, end=None, limit=None, cursor=None, **filters):
+        """
+        Find logs, newest first.
+
+        Args:
+            start: Earliest timestamp (datetime), inclusive
+            end: Latest timestamp (datetime), inclusive
+            limit: Maximum number of logs to return
+            cursor: Cursor returned with the previous page
+            **filters: Field values to match, by API field name
+                (itemId, userId, actionType)
+
+        Returns:
+            logs: Matching logs, newest first
+            next_cursor: Cursor of the next page, or None if this is the last
+
+        Raises:
+            ValueError: If the cursor is not valid
+        """
+        before = decode_cursor(cursor) if cursor else None
+        matches = self.scan(start, end, before, **filters)
+
+        page = list(itertools.islice(matches, limit + 1 if limit is not None else None))
+        next_cursor = None
+        if limit is not None and len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_cursor(page[-1][0])
+
+        return [log for _, log in page], next_cursor
+
+    def rollup(self, dimension, action_type=None, start=None, end=None):
+        """
+        Count logs per value of a dimension, from the rollup counters.
+
+        Args:
+            dimension: One of ActivityRollup.DIMENSIONS
+            action_type: Only count logs of this action type
+            start: First hour or day bucket to include
+            end: Last hour or day bucket to include
+
+        Returns:
+            counts: Dict of value -> number of logs
+        """
+        with self._lock:
+            return self._rollup.counts(dimension, action_type, start, end)
+
+    def scan(self, start=None, end=None, before=None, **filters):
+        """
+        Yield matching logs newest first, from memory and then from the journal.
+
+        Args:
+            start: Earliest timestamp (datetime), inclusive
+            end: Latest timestamp (datetime), inclusive
+            before: Only logs with a (epoch, seq) key before this one
+            **filters: Field values to match, by API field name
+
+        Yields:
+            key, log: The (epoch, seq) key and the log
+        """
+        filters = {field: value for field, value in filters.items() if value is not None}
+        start = start.timestamp() if start else None
+        end = end.timestamp() if end else None
+
+        # Memory is read in chunks, each under the lock, so the store can keep
+        # changing while a long scan is consumed
+        upper = before
+        while True:
+            with self._lock:
+                # Walk the smallest index of the filtered fields and check the rest on the log
+                keys = self._keys
+                if filters:
+                    keys = min((self._indexes[field].get(value, []) for field, value in filters.items()), key=len)
+
+                lo = bisect.bisect_left(keys, (start,)) if start is not None else 0
+                hi = bisect.bisect_right(keys, (end, float("inf"))) if end is not None else len(keys)
+                if upper is not None:
+                    hi = min(hi, bisect.bisect_left(keys, upper))
+                if self._evicted_until is not None:
+                    lo = max(lo, bisect.bisect_right(keys, self._evicted_until))
+
+                first = max(lo, hi - SCAN_CHUNK)
+                chunk = [(key, self._logs[key[1]]) for key in keys[first:hi]]
+                evicted_until = self._evicted_until
+
+            for key, log in reversed(chunk):
+                if all(log.get(field) == value for field, value in filters.items()):
+                    yield key, log
+
+            if first <= lo:
+                break
+            upper = chunk[0][0]
+
+        if self._journal is None or evicted_until is None:
+            return
+
+        # Everything up to and including evicted_until is on disk
+        disk_before = (evicted_until[0], evicted_until[1] + 1)
+        if upper is not None and upper < disk_before:
+            disk_before = upper
+        yield from self._journal.scan(start, end, disk_before, **filters)
+
+    def _evict(self):
+        # Drop the oldest logs down to 90% of the window, as far as they are on disk
+        written = self._journal.written_seq()
+        target = len(self._keys) - self._memory_window * 9 // 10
+
+        count = 0
+        while count < target and self._keys[count][1] <= written:
+            count += 1
+        if not count:
+            return
+
+        evicted = self._keys[:count]
+        del self._keys[:count]
+
+        for key in evicted:
+            log = self._logs.pop(key[1])
+            for field, index in self._indexes.items():
+                value = log.get(field)
+                if value is not None:
+                    value_keys = index[value]
+                    del value_keys[bisect.bisect_left(value_keys, key)]
+                    if not value_keys:
+                        del index[value]
+
+        self._evicted += count
+        self._evicted_until = evicted[-1] if self._evicted_until is None else max(self._evicted_until, evicted[-1])
+
+
+def encode_cursor(key):
+    epoch, seq = key
+    return f"{epoch!r}_{seq}"
+
+
+def decode_cursor(cursor):
+    """
+    Parse a pagination cursor.
+
+    Raises:
+        ValueError: If the cursor is not valid
+    """
+    epoch, seq = cursor.rsplit("_", 1)
+    return float(epoch), int(seq)
+
+
+def _insert(keys, key):
+    # Logs almost always arrive in time order
+    if not keys or key > keys[-1]:
+        keys.append(key)
+    else:
+        bisect.insort(keys, key)
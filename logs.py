@@ -1,6 +1,22 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+import csv
+import io
+import itertools
+import json
 from datetime import datetime
 
+from config import LOG_PAGE_SIZE, MAX_LOG_PAGE_SIZE, LOG_EXPORT_CHUNK_SIZE
+from models.log_store import decode_cursor, encode_cursor
+from models.log_rollup import ActivityRollup, time_bucket
+
+# Streaming export formats: mimetype and download name
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "logs.ndjson"),
+    "csv": ("text/csv", "logs.csv"),
+}
+
+CSV_COLUMNS = ["logId", "timestamp", "userId", "actionType", "itemId", "containerId", "details", "cursor"]
+
 logs_bp = Blueprint('logs', __name__)
 
 
@@ -12,40 +28,146 @@ def get_logs():
     item_id = request.args.get('itemId')
     user_id = request.args.get('userId')
     action_type = request.args.get('actionType')
+    cursor = request.args.get('cursor')
+    export_format = request.args.get('format', 'json')
 
-    # Get logs from in-memory database
-    logs = current_app.config.get('LOGS', [])
+    if export_format != 'json' and export_format not in EXPORT_FORMATS:
+        return jsonify({"success": False, "error": "Format must be 'json', 'ndjson' or 'csv'"}), 400
 
-    # Apply filters
-    filtered_logs = logs
+    # Invalid dates are ignored, as before
+    start = _parse_date(start_date)
+    end = _parse_date(end_date)
 
-    if start_date:
+    if export_format in EXPORT_FORMATS:
         try:
-            start = datetime.fromisoformat(start_date)
-            filtered_logs = [log for log in filtered_logs if datetime.fromisoformat(log["timestamp"]) >= start]
+            before = decode_cursor(cursor) if cursor else None
         except ValueError:
-            pass
+            return jsonify({"success": False, "error": "Invalid cursor"}), 400
+
+        matches = current_app.config['LOGS'].scan(
+            start=start,
+            end=end,
+            before=before,
+            itemId=item_id or None,
+            userId=user_id or None,
+            actionType=action_type or None
+        )
+        return _export(matches, export_format)
+
+    try:
+        limit = int(request.args.get('limit', LOG_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"success": False, "error": "Limit must be an integer"}), 400
+
+    if not 0 < limit <= MAX_LOG_PAGE_SIZE:
+        return jsonify({"success": False, "error": f"Limit must be between 1 and {MAX_LOG_PAGE_SIZE}"}), 400
+
+    # Get logs from the log store, newest first
+    try:
+        logs, next_cursor = current_app.config['LOGS'].query(
+            start=start,
+            end=end,
+            limit=limit,
+            cursor=cursor,
+            itemId=item_id or None,
+            userId=user_id or None,
+            actionType=action_type or None
+        )
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid cursor"}), 400
+
+    return jsonify({
+        "success": True,
+        "logs": logs,
+        "nextCursor": next_cursor
+    })
 
-    if end_date:
-        try:
-            end = datetime.fromisoformat(end_date)
-            filtered_logs = [log for log in filtered_logs if datetime.fromisoformat(log["timestamp"]) <= end]
-        except ValueError:
-            pass
 
-    if item_id:
-        filtered_logs = [log for log in filtered_logs if log.get("itemId") == item_id]
+def _parse_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
 
-    if user_id:
-        filtered_logs = [log for log in filtered_logs if log.get("userId") == user_id]
 
-    if action_type:
-        filtered_logs = [log for log in filtered_logs if log.get("actionType") == action_type]
+@logs_bp.route('/logs/rollup', methods=['GET'])
+def get_rollup():
+    group_by = request.args.get('groupBy', 'actionType')
+    action_type = request.args.get('actionType') or None
 
-    # Sort logs by timestamp (newest first)
-    filtered_logs.sort(key=lambda x: x["timestamp"], reverse=True)
+    if group_by not in ActivityRollup.DIMENSIONS:
+        return jsonify({
+            "success": False,
+            "error": f"groupBy must be one of: {', '.join(ActivityRollup.DIMENSIONS)}"
+        }), 400
+
+    # Time buckets can be limited to a range; other groupings count all history
+    start = end = None
+    if group_by in ('hour', 'day'):
+        start_date = _parse_date(request.args.get('startDate'))
+        end_date = _parse_date(request.args.get('endDate'))
+        start = time_bucket(start_date.isoformat(), group_by) if start_date else None
+        end = time_bucket(end_date.isoformat(), group_by) if end_date else None
+
+    counts = current_app.config['LOGS'].rollup(group_by, action_type, start, end)
+
+    # Time buckets in order, anything else by count
+    if group_by in ('hour', 'day'):
+        ordered = sorted(counts.items())
+    else:
+        ordered = sorted(counts.items(), key=lambda entry: (-entry[1], str(entry[0])))
 
     return jsonify({
         "success": True,
-        "logs": filtered_logs
+        "groupBy": group_by,
+        "actionType": action_type,
+        "counts": [{"key": key, "count": count} for key, count in ordered],
+        "total": sum(counts.values())
     })
+
+
+def _export(matches, export_format):
+    """
+    Stream every matching log, newest first, as NDJSON or CSV.
+
+    Logs are pulled from the store a chunk at a time and each chunk is sent
+    as soon as it is encoded, so memory does not grow with the export. Every
+    row carries its cursor: an interrupted export is resumed by passing the
+    cursor of the last row received.
+    """
+    mimetype, download_name = EXPORT_FORMATS[export_format]
+
+    def generate():
+        if export_format == "csv":
+            yield _csv_rows([CSV_COLUMNS])
+
+        while True:
+            chunk = list(itertools.islice(matches, LOG_EXPORT_CHUNK_SIZE))
+            if not chunk:
+                return
+
+            if export_format == "csv":
+                yield _csv_rows(
+                    [log.get(column, "") for column in CSV_COLUMNS[:-2]]
+                    + [json.dumps(log.get("details", {})), encode_cursor(key)]
+                    for key, log in chunk
+                )
+            else:
+                yield "".join(
+                    json.dumps({**log, "cursor": encode_cursor(key)}, separators=(",", ":")) + "\n"
+                    for key, log in chunk
+                )
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={download_name}"}
+    )
+
+
+def _csv_rows(rows):
+    output = io.StringIO()
+    csv.writer(output).writerows(rows)
+    return output.getvalue()
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify, current_app
-from algorithms.placement import hybrid_guillotine_cut_genetic_algorithm
+from algorithms.genetic_placement import hybrid_guillotine_cut_genetic_algorithm
+from config import PLACEMENT_SYNC_MAX_ITEMS
+from services.job_service import JobConflict
 import uuid
 from datetime import datetime
 
@@ -15,26 +17,40 @@ def placement():
 
     items = data.get('items', [])
     containers = data.get('containers', [])
+    mode = data.get('mode', 'full')
 
-    # Verify required data
-    if not items or not containers:
-        return jsonify({"success": False, "error": "Items and containers are required"}), 400
+    store = current_app.config['STORE']
 
-    # Generate placements and rearrangements
-    placements, rearrangements = hybrid_guillotine_cut_genetic_algorithm(items, containers)
+    if mode == 'incremental':
+        # Place new arrivals around the current arrangement
+        if not items:
+            return jsonify({"success": False, "error": "Items are required"}), 400
 
-    # Store the result in our in-memory database
-    current_app.config['CONTAINERS'] = containers
+        for container in containers:
+            store.add_container(container)
 
-    for placement in placements:
-        item_id = placement["itemId"]
-        item = next((item for item in items if item["itemId"] == item_id), None)
+        if not store.containers():
+            return jsonify({"success": False, "error": "No containers available"}), 400
 
-        if item:
-            item["containerId"] = placement["containerId"]
-            item["position"] = placement["position"]
+        placements, rearrangements = current_app.config['PLACER'].place_items(items)
 
-    current_app.config['ITEMS'] = items
+    elif mode == 'full':
+        # Verify required data
+        if not items or not containers:
+            return jsonify({"success": False, "error": "Items and containers are required"}), 400
+
+        # Large placements take too long to wait for; run them as a job
+        if len(items) > PLACEMENT_SYNC_MAX_ITEMS:
+            return _submit_placement_job(items, containers, data.get('seed'), data.get('userId', 'system'))
+
+        # Generate placements and rearrangements
+        placements, rearrangements = hybrid_guillotine_cut_genetic_algorithm(items, containers)
+
+        # Store the result in our in-memory database
+        store_placements(store, items, containers, placements)
+
+    else:
+        return jsonify({"success": False, "error": f"Unknown placement mode: {mode}"}), 400
 
     # Log the placement operation
     timestamp = datetime.now().isoformat()
@@ -45,8 +61,10 @@ def placement():
         "userId": "system",
         "actionType": "placement",
         "details": {
+            "mode": mode,
             "numItems": len(items),
-            "numContainers": len(containers)
+            "numContainers": len(containers),
+            "numPlaced": len(placements)
         }
     }
     current_app.config['LOGS'].append(log)
@@ -56,3 +74,131 @@ def placement():
         "placements": placements,
         "rearrangements": rearrangements
     })
+
+
+@placement_bp.route('/zone-utilization', methods=['GET'])
+def zone_utilization():
+    store = current_app.config['STORE']
+
+    zones = []
+    for zone, (used, total) in sorted(store.zone_utilization().items()):
+        zones.append({
+            "name": zone,
+            "usedVolume": used,
+            "totalVolume": total,
+            "utilization": round(100 * used / total, 2) if total else 0
+        })
+
+    return jsonify({
+        "success": True,
+        "zones": zones
+    })
+
+
+def _submit_placement_job(items, containers, seed, user_id):
+    """Submit a full placement as a background job; its result is polled on /jobs/<jobId>."""
+    store = current_app.config['STORE']
+    app = current_app._get_current_object()
+
+    # The result replaces the inventory, so it is only stored if nothing changed meanwhile
+    job = current_app.config['JOBS'].submit(
+        'placement', run_placement_job, app, items, containers, seed, store.version(),
+        details={"numItems": len(items), "numContainers": len(containers)}
+    )
+
+    log = {
+        "logId": str(uuid.uuid4()),
+        "timestamp": datetime.now().isoformat(),
+        "userId": user_id,
+        "actionType": "jobSubmitted",
+        "details": {
+            "jobId": job.job_id,
+            "jobType": "placement"
+        }
+    }
+    current_app.config['LOGS'].append(log)
+
+    return jsonify({
+        "success": True,
+        "jobId": job.job_id,
+        "status": job.status
+    }), 202
+
+
+def store_placements(store, items, containers, placements):
+    """
+    Replace the stored arrangement with the result of a full placement.
+
+    Args:
+        store: InventoryStore to update
+        items: Items that were placed
+        containers: Containers they were placed in
+        placements: Placements returned by the placement algorithm
+    """
+    with store.lock:
+        store.load_containers(containers)
+        store.load_items(items)
+
+        for placement in placements:
+            store.set_location(placement["itemId"], placement["containerId"], placement["position"])
+
+
+def run_placement_job(job, app, items, containers, seed, base_version):
+    """
+    Compute a full placement in the background and store it.
+
+    Storing replaces the inventory with the submitted items, so it is done
+    under the store lock and only if the store is still at the version it
+    had when the job was submitted; otherwise changes made meanwhile (a
+    retrieval, a placement, an import) would be silently undone.
+
+    Args:
+        job: Job being run
+        app: Flask application
+        items: Items to place
+        containers: Containers to place them in
+        seed: Seed for the genetic algorithm
+        base_version: Store version when the job was submitted
+
+    Returns:
+        result: Placements and rearrangements, as returned by /placement
+
+    Raises:
+        JobConflict: If the store changed while the job ran; the placements
+            are kept as the job's partial result
+    """
+    placements, rearrangements = hybrid_guillotine_cut_genetic_algorithm(
+        items, containers, seed=seed, on_progress=job.report, should_stop=job.cancelled
+    )
+
+    # A cancelled placement keeps its partial result but is not stored
+    if job.cancelled():
+        return None
+
+    store = app.config['STORE']
+    with app.app_context(), store.lock:
+        if store.version() != base_version:
+            job.report(1.0, {"placements": placements, "rearrangements": rearrangements})
+            raise JobConflict("Inventory changed while the placement ran; the result was not stored")
+
+        store_placements(store, items, containers, placements)
+
+        log = {
+            "logId": str(uuid.uuid4()),
+            "timestamp": datetime.now().isoformat(),
+            "userId": "system",
+            "actionType": "placement",
+            "details": {
+                "mode": "full",
+                "jobId": job.job_id,
+                "numItems": len(items),
+                "numContainers": len(containers),
+                "numPlaced": len(placements)
+            }
+        }
+        app.config['LOGS'].append(log)
+
+    return {
+        "placements": placements,
+        "rearrangements": rearrangements
+    }
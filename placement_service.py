@@ -0,0 +1,246 @@
+from itertools import permutations
+
+from algorithms.spatial_index import position_to_box
+from algorithms.rearrangement import calculate_rearrangement_steps
+
+# Axis permutations of (width, depth, height) an item can be stowed in
+ORIENTATIONS = list(permutations(range(3)))
+
+# Existing items considered for displacement when a new item does not fit
+MAX_DISPLACEMENT_CANDIDATES = 10
+
+
+def _overlaps(a, b):
+    return (a[0] < b[3] and b[0] < a[3] and
+            a[1] < b[4] and b[1] < a[4] and
+            a[2] < b[5] and b[2] < a[5])
+
+
+def _contains(outer, inner):
+    return (outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] <= inner[2] and
+            outer[3] >= inner[3] and outer[4] >= inner[4] and outer[5] >= inner[5])
+
+
+class FreeSpaceMap:
+    """
+    Maximal empty spaces of a container.
+
+    Spaces are boxes (width1, height1, depth1, width2, height2, depth2) in the
+    same coordinates as the R-tree. Occupying a box splits every space it
+    overlaps into the up to six maximal spaces around it.
+    """
+
+    def __init__(self, width, depth, height):
+        self.spaces = [(0, 0, 0, width, height, depth)]
+
+    @classmethod
+    def from_items(cls, container, items):
+        free_space = cls(container["width"], container["depth"], container["height"])
+        for item in items:
+            if item.get("position"):
+                free_space.occupy(position_to_box(item["position"]))
+        return free_space
+
+    def occupy(self, box):
+        kept = []
+        split = []
+
+        for space in self.spaces:
+            if not _overlaps(space, box):
+                kept.append(space)
+                continue
+
+            x1, y1, z1, x2, y2, z2 = space
+            if box[0] > x1:
+                split.append((x1, y1, z1, box[0], y2, z2))
+            if box[3] < x2:
+                split.append((box[3], y1, z1, x2, y2, z2))
+            if box[1] > y1:
+                split.append((x1, y1, z1, x2, box[1], z2))
+            if box[4] < y2:
+                split.append((x1, box[4], z1, x2, y2, z2))
+            if box[2] > z1:
+                split.append((x1, y1, z1, x2, y2, box[2]))
+            if box[5] < z2:
+                split.append((x1, y1, box[5], x2, y2, z2))
+
+        # Only keep split spaces that are not inside another space
+        maximal = []
+        for k, space in enumerate(split):
+            if any(_contains(other, space) for other in kept):
+                continue
+            if any(_contains(other, space) and (other != space or j < k)
+                   for j, other in enumerate(split) if j != k):
+                continue
+            maximal.append(space)
+
+        self.spaces = kept + maximal
+
+    def find_fit(self, item):
+        """
+        Find the space closest to the open face that fits an item.
+
+        Args:
+            item: Item with width, depth and height
+
+        Returns:
+            box: Box the item would occupy, or None if it does not fit
+        """
+        dims = (item["width"], item["depth"], item["height"])
+        best = None
+
+        for space in self.spaces:
+            if best is not None and (space[2], space[1], space[0]) >= (best[2], best[1], best[0]):
+                continue
+
+            for axes in ORIENTATIONS:
+                w, d, h = dims[axes[0]], dims[axes[1]], dims[axes[2]]
+                if (w <= space[3] - space[0] and h <= space[4] - space[1] and
+                        d <= space[5] - space[2]):
+                    best = (space[0], space[1], space[2],
+                            space[0] + w, space[1] + h, space[2] + d)
+                    break
+
+        return best
+
+
+def box_to_position(box):
+    return {
+        "startCoordinates": {"width": box[0], "depth": box[2], "height": box[1]},
+        "endCoordinates": {"width": box[3], "depth": box[5], "height": box[4]}
+    }
+
+
+class IncrementalPlacer:
+    """
+    Places new arrivals into the existing arrangement.
+
+    Free-space maps are cached per container between calls and only rebuilt
+    when the store reports that the container changed behind our back.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._free_space = {}  # containerId -> (store revision, FreeSpaceMap)
+
+    def free_space(self, container_id):
+        revision = self.store.revision(container_id)
+        cached = self._free_space.get(container_id)
+
+        if cached is None or cached[0] != revision:
+            container = self.store.get_container(container_id)
+            free_space = FreeSpaceMap.from_items(container, self.store.items_in_container(container_id))
+            self._free_space[container_id] = (revision, free_space)
+            return free_space
+
+        return cached[1]
+
+    def place_items(self, items):
+        """
+        Add items to the store and place them around the stowed items.
+
+        Args:
+            items: List of new items
+
+        Returns:
+            placements: List of placements for the new items that fit
+            rearrangements: Steps to move existing items that had to make room
+        """
+        # Placing reads the free space and then writes it; nothing may change in between
+        with self.store.lock:
+            return self._place_items(items)
+
+    def _place_items(self, items):
+        placements = []
+        moved_from = []
+        moved_to = []
+
+        # Large, high priority items first
+        ordered = sorted(
+            items,
+            key=lambda i: (-i.get("priority", 50), -(i["width"] * i["depth"] * i["height"]))
+        )
+
+        for new_item in ordered:
+            item = self.store.add_item(new_item)
+
+            placement = self._place(item, self._candidates(item))
+            if placement is None:
+                placement, displaced = self._place_with_rearrangement(item)
+                if displaced is not None:
+                    moved_from.append(displaced[0])
+                    moved_to.append(displaced[1])
+
+            if placement is not None:
+                placements.append(placement)
+
+        rearrangements = calculate_rearrangement_steps(moved_from, moved_to)
+
+        return placements, rearrangements
+
+    def _candidates(self, item, exclude=None):
+        preferred = item.get("preferredZone")
+        containers = self.store.containers()
+        ordered = ([c for c in containers if c["zone"] == preferred] +
+                   [c for c in containers if c["zone"] != preferred])
+        return [c["containerId"] for c in ordered if c["containerId"] != exclude]
+
+    def _place(self, item, container_ids):
+        for container_id in container_ids:
+            free_space = self.free_space(container_id)
+            box = free_space.find_fit(item)
+            if box is not None:
+                return self._commit(item, container_id, free_space, box)
+        return None
+
+    def _commit(self, item, container_id, free_space, box):
+        position = box_to_position(box)
+        self.store.set_location(item["itemId"], container_id, position)
+
+        free_space.occupy(box)
+        self._free_space[container_id] = (self.store.revision(container_id), free_space)
+
+        return {"itemId": item["itemId"], "containerId": container_id, "position": position}
+
+    def _place_with_rearrangement(self, item):
+        """Make room for an item by moving one low priority item elsewhere."""
+        for container_id in self._candidates(item):
+            container = self.store.get_container(container_id)
+            stowed = self.store.items_in_container(container_id)
+            candidates = sorted(
+                (i for i in stowed if i.get("position") and i.get("priority", 50) < item.get("priority", 50)),
+                key=lambda i: (i.get("priority", 50), i["width"] * i["depth"] * i["height"])
+            )[:MAX_DISPLACEMENT_CANDIDATES]
+
+            for displaced in candidates:
+                without = FreeSpaceMap.from_items(
+                    container, (i for i in stowed if i["itemId"] != displaced["itemId"])
+                )
+                box = without.find_fit(item)
+                if box is None:
+                    continue
+
+                # The displaced item has to fit somewhere else
+                target = None
+                for other_id in self._candidates(displaced, exclude=container_id):
+                    other_box = self.free_space(other_id).find_fit(displaced)
+                    if other_box is not None:
+                        target = other_id
+                        break
+
+                if target is None:
+                    continue
+
+                before = {
+                    "itemId": displaced["itemId"],
+                    "containerId": container_id,
+                    "position": displaced["position"]
+                }
+                after = self._commit(displaced, target, self.free_space(target), other_box)
+
+                without.occupy(box)
+                placement = self._commit(item, container_id, without, box)
+
+                return placement, (before, after)
+
+        return None, None
@@ -1,240 +1,456 @@
+import heapq
 import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
 
+from config import GRASP_MAX_ITERATIONS, TABU_LIST_SIZE
+
+# Score bonus for an item stowed in its preferred zone
+ZONE_MATCH_SCORE = 50
+
+# GRASP parameter (0-1)
+GRASP_ALPHA = 0.3
 
-def grasp_tabu_search_rearrangement(items, containers, current_placements):
+
+def grasp_tabu_search_rearrangement(items, containers, current_placements, tabu_tenure=None,
+                                    max_iterations=None, workers=1, time_budget=None, seed=None,
+                                    on_progress=None, should_stop=None):
     """
     Implements the GRASP + Tabu Search algorithm for container rearrangement.
 
+    Solutions are int32 arrays mapping each placement index to a slot index,
+    where slots are the (containerId, position) pairs of current_placements.
+    Swaps are applied to these arrays in place and undone by swapping again.
+
+    GRASP restarts are independent: restart k always draws from its own RNG
+    seeded from (seed, k), so they can be spread over a process pool and the
+    result only depends on the seed. With a time budget no restart is started
+    after the deadline and running ones stop early; the best solution among
+    the restarts that ran is returned, ties going to the lowest restart.
+
     Args:
         items: List of items to be placed
         containers: List of available containers
         current_placements: Current placement of items
+        tabu_tenure: Number of recent moves kept tabu (default TABU_LIST_SIZE)
+        max_iterations: Number of GRASP restarts (default GRASP_MAX_ITERATIONS)
+        workers: Number of worker processes (1 runs in-process)
+        time_budget: Wall-clock budget in seconds, or None for no limit
+        seed: Seed for the restarts' random number generators
+        on_progress: Optional callable (fraction done, partial result) called
+            after each restart with the best placements so far
+        should_stop: Optional callable; no further restarts are run once it
+            returns True and the best placements so far are returned
 
     Returns:
         new_placements: New placement recommendations
         rearrangement_steps: List of rearrangement steps
     """
     # Parameters
-    max_iterations = 100
-    tabu_list_size = 10
-    alpha = 0.3  # GRASP parameter
+    max_iterations = max_iterations or GRASP_MAX_ITERATIONS
+    tabu_tenure = tabu_tenure or TABU_LIST_SIZE
+    seed = seed if seed is not None else random.randrange(2 ** 32)
+    deadline = time.time() + time_budget if time_budget is not None else None
+
+    # Precompute scoring tables once for the whole search
+    scorer = SwapScorer(items, containers, current_placements)
 
     # Initialize best solution and score
-    best_solution = current_placements.copy()
-    best_score = evaluate_placement(best_solution, items, containers)
+    initial_solution = np.arange(len(current_placements), dtype=np.int32)
+    best = (scorer.score(initial_solution), -1, initial_solution)
 
-    # Initialize tabu list
-    tabu_list = []
+    def merge(result, done):
+        nonlocal best
 
-    # GRASP + Tabu Search
-    for iteration in range(max_iterations):
-        # GRASP Construction Phase
-        rcl = construct_rcl(items, containers, current_placements, alpha)
+        # Best score first, then lowest restart number
+        if result is not None and (-result[0], result[1]) < (-best[0], best[1]):
+            best = result
 
-        # Select a random solution from RCL
-        current_solution = random.choice(rcl) if rcl else best_solution.copy()
-        current_score = evaluate_placement(current_solution, items, containers)
+        if on_progress is not None:
+            on_progress(done / max_iterations, {
+                "placements": scorer.to_placements(best[2]),
+                "score": best[0]
+            })
 
-        # Tabu Search Local Improvement
-        for _ in range(20):  # Number of local search iterations
-            # Generate neighborhood
-            neighbors = generate_neighbors(current_solution, items, containers)
+    restarts = range(max_iterations)
+
+    if workers > 1 and max_iterations > 1:
+        # Restarts are queued in order, so under a time budget the low
+        # restart numbers run first whatever the number of workers; the
+        # scorer is sent once per worker, not with every restart
+        with ProcessPoolExecutor(
+            max_workers=min(workers, max_iterations),
+            initializer=_init_worker,
+            initargs=(scorer,)
+        ) as executor:
+            futures = [executor.submit(_run_worker_restart, restart, seed, deadline, tabu_tenure)
+                       for restart in restarts]
+
+            for done, future in enumerate(as_completed(futures), 1):
+                merge(future.result(), done)
+
+                if should_stop is not None and should_stop():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+    else:
+        for done, restart in enumerate(restarts, 1):
+            if should_stop is not None and should_stop():
+                break
 
-            # Filter out tabu moves
-            non_tabu_neighbors = [n for n in neighbors if not is_tabu(n, tabu_list)]
+            merge(run_restart(scorer, restart, seed, deadline, tabu_tenure), done)
 
-            if not non_tabu_neighbors:
-                continue
+    # Calculate rearrangement steps from current_placements to best_solution
+    new_placements = scorer.to_placements(best[2])
+    rearrangement_steps = calculate_rearrangement_steps(current_placements, new_placements)
 
-            # Select best neighbor
-            best_neighbor = None
-            best_neighbor_score = float('-inf')
+    return new_placements, rearrangement_steps
 
-            for neighbor in non_tabu_neighbors:
-                score = evaluate_placement(neighbor, items, containers)
-                if score > best_neighbor_score:
-                    best_neighbor = neighbor
-                    best_neighbor_score = score
 
-            # Update current solution
-            if best_neighbor_score > current_score:
-                tabu_move = get_tabu_move(current_solution, best_neighbor)
-                if tabu_move:
-                    tabu_list.append(tabu_move)
-                    if len(tabu_list) > tabu_list_size:
-                        tabu_list.pop(0)
+def run_restart(scorer, restart, seed, deadline, tabu_tenure):
+    """
+    Run one GRASP restart.
+
+    Args:
+        scorer: SwapScorer for the search
+        restart: Restart number, which selects the RNG stream
+        seed: Base seed of the search
+        deadline: time.time() value after which to stop, or None
+        tabu_tenure: Number of recent moves kept tabu
+
+    Returns:
+        (score, restart, solution), or None if the deadline already passed
+    """
+    if deadline is not None and time.time() > deadline:
+        return None
 
-                current_solution = best_neighbor
-                current_score = best_neighbor_score
+    rng = random.Random(f"{seed}:{restart}")
+    initial_solution = np.arange(len(scorer.placements), dtype=np.int32)
 
-        # Update best solution
-        if current_score > best_score:
-            best_solution = current_solution
-            best_score = current_score
+    # GRASP Construction Phase
+    rcl = construct_rcl(initial_solution, GRASP_ALPHA, rng)
 
-    # Calculate rearrangement steps from current_placements to best_solution
-    rearrangement_steps = calculate_rearrangement_steps(current_placements, best_solution)
+    # Select a random solution from RCL
+    current_solution = rng.choice(rcl) if rcl else initial_solution
+
+    # Tabu Search Local Improvement
+    score = tabu_search(
+        scorer, current_solution, TabuMemory(tabu_tenure), scorer.score(initial_solution), deadline
+    )
+
+    return score, restart, current_solution
 
-    return best_solution, rearrangement_steps
 
+# Worker process state, set once per pool worker so only the restart
+# parameters are sent per task
+_worker_scorer = None
 
-def construct_rcl(items, containers, current_placements, alpha):
+
+def _init_worker(scorer):
+    global _worker_scorer
+    _worker_scorer = scorer
+
+
+def _run_worker_restart(restart, seed, deadline, tabu_tenure):
+    return run_restart(_worker_scorer, restart, seed, deadline, tabu_tenure)
+
+
+def tabu_search(scorer, current_solution, tabu_memory, best_score, deadline=None):
+    """
+    Improve a solution in place with Tabu Search over swap moves.
+
+    Args:
+        scorer: SwapScorer for the search
+        current_solution: Starting solution, as a slot array
+        tabu_memory: TabuMemory to use
+        best_score: Best score known so far, for the aspiration criterion
+        deadline: time.time() value after which to stop, or None
+
+    Returns:
+        current_score: Score of the improved solution
+    """
+    current_score = scorer.score(current_solution)
+    neighborhood = SwapNeighborhood(scorer, current_solution)
+
+    def allowed(i, j, delta):
+        # Aspiration: a tabu move is allowed if it beats the best solution
+        return (not tabu_memory.is_tabu(current_solution, i, j) or
+                current_score + delta > best_score)
+
+    for _ in range(20):  # Number of local search iterations
+        if deadline is not None and time.time() > deadline:
+            break
+
+        # Select best allowed improving neighbor
+        best_move = neighborhood.best_move(allowed)
+
+        if best_move is None:
+            break
+
+        # Update current solution
+        i, j, delta = best_move
+        tabu_memory.add(current_solution, i, j)
+
+        neighborhood.swap(i, j)
+        current_score += delta
+        best_score = max(best_score, current_score)
+
+    return current_score
+
+
+def construct_rcl(current_solution, alpha, rng=random):
     """
     Construct Restricted Candidate List (RCL) for GRASP.
 
     Args:
-        items: List of items
-        containers: List of containers
-        current_placements: Current placement
+        current_solution: Current placement as a slot array
         alpha: GRASP parameter (0-1)
+        rng: Random number generator
 
     Returns:
         rcl: List of candidate solutions
     """
     # This is a simplified implementation
     rcl = []
+    n = len(current_solution)
 
     # Generate candidate solutions
     for _ in range(10):  # Generate 10 candidates
-        candidate = current_placements.copy()
+        candidate = current_solution.copy()
 
         # Apply random swaps
-        num_swaps = random.randint(1, 5)
+        num_swaps = rng.randint(1, 5)
         for _ in range(num_swaps):
-            if len(candidate) >= 2:
-                i, j = random.sample(range(len(candidate)), 2)
-
-                # Swap container IDs
-                temp_container = candidate[i]["containerId"]
-                candidate[i]["containerId"] = candidate[j]["containerId"]
-                candidate[j]["containerId"] = temp_container
-
-                # Swap positions
-                temp_position = candidate[i]["position"]
-                candidate[i]["position"] = candidate[j]["position"]
-                candidate[j]["position"] = temp_position
+            if n >= 2:
+                i, j = rng.sample(range(n), 2)
+                apply_swap(candidate, i, j)
 
         rcl.append(candidate)
 
     return rcl
 
 
-def generate_neighbors(current_solution, items, containers):
+class SwapNeighborhood:
     """
-    Generate neighboring solutions for Tabu Search.
-
-    Args:
-        current_solution: Current placement
-        items: List of items
-        containers: List of containers
-
-    Returns:
-        neighbors: List of neighboring solutions
+    Swap neighborhood of a solution for Tabu Search.
+
+    The score change of swapping placement i (in zone a) with placement j
+    (in zone b) is gain[i, b] + gain[j, a], where gain[k, z] is what
+    placement k gains by moving to zone z. The best swap between two zones
+    is therefore the best placement of each side, found per zone pair with
+    one pass over the n x zones gain table; only when that swap is rejected
+    are the pair's candidates sorted to walk the next best ones. A swap
+    only changes the gain rows of the two swapped placements, so memory and
+    the work per move are O(n * zones) and no neighbor solution is built.
     """
-    neighbors = []
-
-    # Generate neighbors by swapping pairs of items
-    if len(current_solution) >= 2:
-        for i in range(len(current_solution)):
-            for j in range(i + 1, len(current_solution)):
-                neighbor = current_solution.copy()
 
-                # Swap container IDs
-                temp_container = neighbor[i]["containerId"]
-                neighbor[i]["containerId"] = neighbor[j]["containerId"]
-                neighbor[j]["containerId"] = temp_container
+    def __init__(self, scorer, solution):
+        self.scorer = scorer
+        self.solution = solution
+        self.gains = scorer.gains(solution)
+
+    def best_move(self, accept):
+        """
+        Find the best improving swap accepted by a predicate.
+
+        Args:
+            accept: Callable (i, j, delta) -> bool, e.g. a tabu check
+
+        Returns:
+            (i, j, delta) of the best accepted improving swap, or None
+        """
+        zone = self.scorer.slot_zone[self.solution]
+        members = [np.flatnonzero(zone == z) for z in range(self.gains.shape[1])]
+        occupied = [z for z, m in enumerate(members) if len(m)]
+
+        # Best placement of zone a to move into zone b, per ordered zone pair
+        top = {}
+        for a in occupied:
+            best = np.argmax(self.gains[members[a]], axis=0)
+            for b in occupied:
+                if b != a:
+                    top[a, b] = int(members[a][best[b]])
+
+        # Heap of (-delta, i, j, a, b, p, q): the swap of the p-th best
+        # placement of zone a with the q-th best of zone b
+        heap = []
+        for a in occupied:
+            for b in occupied:
+                if a < b:
+                    self._push(heap, a, b, 0, 0, top[a, b], top[b, a])
+
+        ranked = {}
+        while heap:
+            neg_delta, i, j, a, b, p, q = heapq.heappop(heap)
+            if accept(i, j, -neg_delta):
+                return i, j, -neg_delta
+
+            # Next best swaps of the pair, each (p, q) reached once
+            for ka, kb in ((a, b), (b, a)):
+                if (ka, kb) not in ranked:
+                    order = np.argsort(-self.gains[members[ka], kb], kind="stable")
+                    ranked[ka, kb] = members[ka][order]
+            for p2, q2 in ((p, q + 1), (p + 1, q)) if q == 0 else ((p, q + 1),):
+                if p2 < len(members[a]) and q2 < len(members[b]):
+                    self._push(heap, a, b, p2, q2, int(ranked[a, b][p2]), int(ranked[b, a][q2]))
 
-                # Swap positions
-                temp_position = neighbor[i]["position"]
-                neighbor[i]["position"] = neighbor[j]["position"]
-                neighbor[j]["position"] = temp_position
+        return None
 
-                neighbors.append(neighbor)
+    def _push(self, heap, a, b, p, q, i, j):
+        delta = float(self.gains[i, b] + self.gains[j, a])
+        if delta > 0:
+            heapq.heappush(heap, (-delta, i, j, a, b, p, q))
 
-    return neighbors
+    def swap(self, i, j):
+        """Apply a swap to the solution and update the gains of the two placements."""
+        apply_swap(self.solution, i, j)
+        for k in (i, j):
+            self.gains[k] = self.scorer.table[k] - self.scorer.item_score(k, self.solution[k])
 
 
-def evaluate_placement(placement, items, containers):
+def apply_swap(solution, i, j):
     """
-    Evaluate a placement solution.
+    Swap the slots of two placements in place. Applying the same swap again
+    undoes it.
 
     Args:
-        placement: Placement solution
-        items: List of items
-        containers: List of containers
+        solution: Placement as a slot array
+        i: Index of the first placement
+        j: Index of the second placement
+    """
+    solution[i], solution[j] = solution[j], solution[i]
 
-    Returns:
-        score: Evaluation score
+
+class SwapScorer:
     """
-    # This is a simplified scoring function
-    score = 0
+    Scores slot-array solutions from a precomputed item x zone score table.
 
-    # Create a mapping from item ID to item data
-    item_map = {item["itemId"]: item for item in items}
+    The score of a solution is a sum of independent per-placement terms that
+    only depend on the item and the zone of its slot, so swapping the slots
+    of two items only changes two terms and can be scored in O(1).
+    """
 
-    # Score based on priority and preferred zone
-    for p in placement:
-        item_id = p["itemId"]
-        container_id = p["containerId"]
+    def __init__(self, items, containers, placements):
+        item_map = {item["itemId"]: item for item in items}
+        container_zone = {c["containerId"]: c["zone"] for c in containers}
 
-        if item_id in item_map:
-            item = item_map[item_id]
+        self.placements = placements
+        zones = sorted(set(container_zone.values()))
+        zone_ids = {zone: z for z, zone in enumerate(zones)}
 
-            # Find container
-            container = next((c for c in containers if c["containerId"] == container_id), None)
+        # Slot k is the location of placements[k]; slots in unknown
+        # containers map to an extra all-zero column
+        self.slot_zone = np.array(
+            [zone_ids.get(container_zone.get(p["containerId"]), len(zones)) for p in placements],
+            dtype=np.int32
+        )
 
-            if container:
-                # Priority score (higher priority = higher score)
-                score += item.get("priority", 0)
+        # table[i, z]: score of placement i's item stowed in zone z
+        self.table = np.zeros((len(placements), len(zones) + 1), dtype=np.float32)
 
-                # Preferred zone score
-                if container["zone"] == item.get("preferredZone", ""):
-                    score += 50
+        for k, p in enumerate(placements):
+            item = item_map.get(p["itemId"])
+            if item is None:
+                continue
 
-    return score
+            # Priority score (higher priority = higher score)
+            self.table[k, :len(zones)] = item.get("priority", 0)
 
+            # Preferred zone score
+            preferred = zone_ids.get(item.get("preferredZone", ""))
+            if preferred is not None:
+                self.table[k, preferred] += ZONE_MATCH_SCORE
 
-def is_tabu(solution, tabu_list):
-    """
-    Check if a solution is in the tabu list.
+    def item_score(self, i, slot):
+        return float(self.table[i, self.slot_zone[slot]])
 
-    Args:
-        solution: Solution to check
-        tabu_list: List of tabu moves
+    def scores(self, items, slots):
+        """Vectorized item_score over arrays of placement and slot indices."""
+        return self.table[items, self.slot_zone[slots]]
 
-    Returns:
-        True if tabu, False otherwise
-    """
-    for tabu_move in tabu_list:
-        if set(tabu_move) == set((p["itemId"], p["containerId"]) for p in solution):
-            return True
+    def score(self, solution):
+        return float(self.scores(np.arange(len(solution)), solution).sum())
 
-    return False
+    def swap_delta(self, solution, i, j):
+        a = solution[i]
+        b = solution[j]
 
+        return (self.item_score(i, b) + self.item_score(j, a) -
+                self.item_score(i, a) - self.item_score(j, b))
 
-def get_tabu_move(current_solution, new_solution):
+    def gains(self, solution):
+        """Score change of moving each placement to each zone, as an n x zones table."""
+        return self.table - self.scores(np.arange(len(solution)), solution)[:, None]
+
+    def to_placements(self, solution):
+        """Convert a slot array back into placement dicts."""
+        return [
+            dict(p,
+                 containerId=self.placements[slot]["containerId"],
+                 position=self.placements[slot]["position"])
+            for p, slot in zip(self.placements, solution.tolist())
+        ]
+
+
+def evaluate_placement(placement, items, containers):
     """
-    Get the tabu move between two solutions.
+    Evaluate a placement solution.
 
     Args:
-        current_solution: Current placement
-        new_solution: New placement
+        placement: Placement solution
+        items: List of items
+        containers: List of containers
 
     Returns:
-        tabu_move: Tabu move representation
+        score: Evaluation score
     """
-    # Create a set of (itemId, containerId) pairs for each solution
-    current_set = set((p["itemId"], p["containerId"]) for p in current_solution)
-    new_set = set((p["itemId"], p["containerId"]) for p in new_solution)
+    scorer = SwapScorer(items, containers, placement)
+    return scorer.score(np.arange(len(placement), dtype=np.int32))
 
-    # Find differences
-    differences = current_set.symmetric_difference(new_set)
 
-    if differences:
-        return tuple(differences)
-    else:
-        return None
+class TabuMemory:
+    """
+    Tabu memory of move attributes.
+
+    A swap of placements i and j vacates the attributes (i, old slot of i)
+    and (j, old slot of j). These are kept in a hash multiset for the last
+    `tenure` moves, with a FIFO to expire them, so checking a move costs two
+    set lookups regardless of the tenure.
+    """
+
+    def __init__(self, tenure):
+        self.tenure = tenure
+        self._moves = deque()
+        self._attributes = {}  # (placement index, slot) -> count
+
+    def __len__(self):
+        return len(self._moves)
+
+    def add(self, solution, i, j):
+        """Record a swap about to be applied to solution."""
+        move = ((i, int(solution[i])), (j, int(solution[j])))
+        self._moves.append(move)
+        for attribute in move:
+            self._attributes[attribute] = self._attributes.get(attribute, 0) + 1
+
+        if len(self._moves) > self.tenure:
+            for attribute in self._moves.popleft():
+                count = self._attributes[attribute] - 1
+                if count:
+                    self._attributes[attribute] = count
+                else:
+                    del self._attributes[attribute]
+
+    def is_tabu(self, solution, i, j):
+        """
+        Check if a swap puts either item back into a slot a recent move
+        took it out of.
+        """
+        return ((i, int(solution[j])) in self._attributes or
+                (j, int(solution[i])) in self._attributes)
 
 
 def calculate_rearrangement_steps(current_placements, new_placements):
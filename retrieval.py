@@ -1,23 +1,34 @@
-def retrieval_algorithm_3d_a_star_rtree(item, container_id, all_items):
+import numpy as np
+
+# Cells of the targets x items blocking matrix tested per broadcast
+BLOCKING_CHUNK_CELLS = 1000000
+
+
+def retrieval_algorithm_3d_a_star_rtree(item, container_id, all_items=None, rtree=None):
     """
     Implements the 3D A* + R-tree Indexing algorithm for item retrieval.
 
     Args:
         item: Item to be retrieved
         container_id: ID of the container
-        all_items: All items in the system
+        all_items: All items in the system (scanned when no R-tree is given)
+        rtree: Spatial index of the items placed in the container
 
     Returns:
         retrieval_steps: List of steps required to retrieve the item
     """
-    # Get items in the same container
-    container_items = [i for i in all_items if i["containerId"] == container_id and i["itemId"] != item["itemId"]]
-
     # Get item position
     item_position = item.get("position")
     if not item_position:
         return []
 
+    # Get candidate items in the same container
+    if rtree is not None:
+        container_items = [i for i in rtree.search(front_box(item_position)) if i["itemId"] != item["itemId"]]
+    else:
+        container_items = [i for i in all_items or []
+                           if i.get("containerId") == container_id and i["itemId"] != item["itemId"]]
+
     # Find blocking items
     blocking_items = find_blocking_items(item_position, container_items)
 
@@ -69,6 +80,25 @@ def retrieval_algorithm_3d_a_star_rtree(item, container_id, all_items):
     return retrieval_steps
 
 
+def front_box(item_position):
+    """
+    Get the region between the open face of the container and an item.
+
+    Args:
+        item_position: Position of the target item
+
+    Returns:
+        box: Query box in R-tree coordinates (width, height, depth)
+    """
+    start = item_position["startCoordinates"]
+    end = item_position["endCoordinates"]
+
+    return (
+        start["width"], start["height"], float('-inf'),
+        end["width"], end["height"], start["depth"]
+    )
+
+
 def find_blocking_items(item_position, container_items):
     """
     Find items that block the retrieval path of the target item.
@@ -111,3 +141,140 @@ def find_blocking_items(item_position, container_items):
                 blocking_items.append(item)
 
     return blocking_items
+
+
+def batch_retrieval_plan(targets, container_items=None, spatial=None):
+    """
+    Plan the retrieval of several items at once.
+
+    Blocking relations are computed per container with a broadcast overlap
+    test of the targets against the item boxes, a chunk of targets at a
+    time so the matrix stays bounded. With an R-tree for the container, only
+    the items it returns for the regions in front of the targets are tested;
+    otherwise all of the container's items are. The plan is merged so an
+    item in front of several targets is removed and placed back only once.
+
+    Args:
+        targets: Items to be retrieved
+        container_items: Mapping of container ID to the items placed in it,
+            tested for containers without an R-tree
+        spatial: Mapping of container ID to the R-tree of the items placed in it
+
+    Returns:
+        retrieval_steps: List of steps required to retrieve all targets
+    """
+    container_items = container_items or {}
+    spatial = spatial or {}
+
+    # Group targets by container
+    targets_by_container = {}
+    for item in targets:
+        if item.get("containerId") and item.get("position"):
+            targets_by_container.setdefault(item["containerId"], {})[item["itemId"]] = item
+
+    retrieval_steps = []
+    step_counter = 1
+
+    for container_id, container_targets in targets_by_container.items():
+        rtree = spatial.get(container_id)
+        if rtree is not None:
+            candidates = {}
+            for item in container_targets.values():
+                for candidate in rtree.search(front_box(item["position"])):
+                    candidates.setdefault(candidate["itemId"], candidate)
+            candidates = candidates.values()
+        else:
+            candidates = [i for i in container_items.get(container_id, []) if i.get("position")]
+
+        # Targets first, then the other items that may block them
+        items = list(container_targets.values())
+        items.extend(i for i in candidates if i["itemId"] not in container_targets)
+
+        boxes = items_to_boxes(items)
+        blocking = np.zeros(len(items), dtype=bool)
+        chunk = max(1, BLOCKING_CHUNK_CELLS // len(items))
+        for first in range(0, len(container_targets), chunk):
+            target_indices = np.arange(first, min(first + chunk, len(container_targets)))
+            blocking |= find_blocking_matrix(boxes, target_indices).any(axis=0)
+
+        is_target = np.arange(len(items)) < len(container_targets)
+        needed = is_target | blocking
+
+        # Work from the open face inwards
+        order = [k for k in np.argsort(boxes[:, 2], kind="stable") if needed[k]]
+        removed = []
+
+        for k in order:
+            item = items[k]
+            action = "retrieve" if is_target[k] else "remove"
+            retrieval_steps.append({
+                "step": step_counter,
+                "action": action,
+                "itemId": item["itemId"],
+                "itemName": item.get("name", ""),
+                "containerId": container_id
+            })
+            step_counter += 1
+
+            if action == "remove":
+                removed.append(item)
+
+        # Place blocking items back
+        for item in reversed(removed):
+            retrieval_steps.append({
+                "step": step_counter,
+                "action": "placeBack",
+                "itemId": item["itemId"],
+                "itemName": item.get("name", ""),
+                "containerId": container_id
+            })
+            step_counter += 1
+
+    return retrieval_steps
+
+
+def items_to_boxes(items):
+    """
+    Stack item positions into an array of boxes.
+
+    Args:
+        items: Items with positions
+
+    Returns:
+        boxes: Array of shape (n, 6) with columns
+            (width1, height1, depth1, width2, height2, depth2)
+    """
+    boxes = np.empty((len(items), 6), dtype=float)
+
+    for k, item in enumerate(items):
+        start = item["position"]["startCoordinates"]
+        end = item["position"]["endCoordinates"]
+        boxes[k] = (start["width"], start["height"], start["depth"],
+                    end["width"], end["height"], end["depth"])
+
+    return boxes
+
+
+def find_blocking_matrix(boxes, target_indices):
+    """
+    Vectorized version of find_blocking_items for several targets.
+
+    Args:
+        boxes: Array of item boxes, as returned by items_to_boxes
+        target_indices: Indices of the target items in boxes
+
+    Returns:
+        blocking: Boolean array of shape (len(target_indices), n) where
+            blocking[t, j] is True if item j blocks target t
+    """
+    target = boxes[target_indices][:, None, :]
+    other = boxes[None, :, :]
+
+    blocking = (
+        (other[..., 2] < target[..., 2]) &
+        (other[..., 0] < target[..., 3]) & (other[..., 3] > target[..., 0]) &
+        (other[..., 1] < target[..., 4]) & (other[..., 4] > target[..., 1])
+    )
+    blocking[np.arange(len(target_indices)), target_indices] = False
+
+    return blocking
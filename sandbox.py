@@ -0,0 +1,119 @@
+from flask import Blueprint, request, jsonify, current_app, g
+from services.sandbox_service import SandboxConflict
+import uuid
+from datetime import datetime
+
+sandbox_bp = Blueprint('sandbox', __name__)
+
+# Blueprints whose endpoints can run against a sandbox
+SANDBOXED_BLUEPRINTS = ('simulate', 'waste')
+
+
+@sandbox_bp.before_app_request
+def resolve_sandbox():
+    sandbox_id = request.args.get('sandboxId') or request.headers.get('X-Sandbox-Id')
+    if not sandbox_id:
+        return None
+
+    if request.blueprint not in SANDBOXED_BLUEPRINTS:
+        return jsonify({"success": False, "error": "Endpoint cannot run in a sandbox"}), 400
+
+    sandbox = current_app.config['SANDBOXES'].get(sandbox_id)
+    if sandbox is None:
+        return jsonify({"success": False, "error": "Sandbox not found"}), 404
+
+    g.sandbox = sandbox
+    return None
+
+
+def get_store():
+    """Store of the request's sandbox, or the live store."""
+    sandbox = g.get('sandbox')
+    return sandbox.store if sandbox else current_app.config['STORE']
+
+
+def get_current_date():
+    sandbox = g.get('sandbox')
+    return sandbox.current_date if sandbox else current_app.config.get('CURRENT_DATE', '2025-04-06')
+
+
+def set_current_date(current_date):
+    sandbox = g.get('sandbox')
+    if sandbox:
+        sandbox.current_date = current_date
+    else:
+        current_app.config['CURRENT_DATE'] = current_date
+
+
+def append_log(log):
+    sandbox = g.get('sandbox')
+    if sandbox:
+        sandbox.logs.append(log)
+    else:
+        current_app.config['LOGS'].append(log)
+
+
+@sandbox_bp.route('/sandbox', methods=['POST'])
+def create_sandbox():
+    sandbox = current_app.config['SANDBOXES'].create(current_app.config.get('CURRENT_DATE', '2025-04-06'))
+
+    return jsonify({
+        "success": True,
+        "sandbox": sandbox.to_dict()
+    }), 201
+
+
+@sandbox_bp.route('/sandbox/<sandbox_id>', methods=['GET'])
+def get_sandbox(sandbox_id):
+    sandbox = current_app.config['SANDBOXES'].get(sandbox_id)
+
+    if sandbox is None:
+        return jsonify({"success": False, "error": "Sandbox not found"}), 404
+
+    return jsonify({
+        "success": True,
+        "sandbox": sandbox.to_dict()
+    })
+
+
+@sandbox_bp.route('/sandbox/<sandbox_id>', methods=['DELETE'])
+def discard_sandbox(sandbox_id):
+    sandbox = current_app.config['SANDBOXES'].discard(sandbox_id)
+
+    if sandbox is None:
+        return jsonify({"success": False, "error": "Sandbox not found"}), 404
+
+    return jsonify({"success": True})
+
+
+@sandbox_bp.route('/sandbox/<sandbox_id>/commit', methods=['POST'])
+def commit_sandbox(sandbox_id):
+    try:
+        sandbox = current_app.config['SANDBOXES'].commit(sandbox_id, current_app.config)
+    except SandboxConflict as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+
+    if sandbox is None:
+        return jsonify({"success": False, "error": "Sandbox not found"}), 404
+
+    # Log the commit
+    timestamp = datetime.now().isoformat()
+    log_id = str(uuid.uuid4())
+    log = {
+        "logId": log_id,
+        "timestamp": timestamp,
+        "userId": "system",
+        "actionType": "sandboxCommit",
+        "details": {
+            "sandboxId": sandbox_id,
+            "itemsChanged": len(sandbox.store.changed_items()),
+            "itemsRemoved": len(sandbox.store.removed_item_ids()),
+            "newDate": sandbox.current_date
+        }
+    }
+    current_app.config['LOGS'].append(log)
+
+    return jsonify({
+        "success": True,
+        "sandbox": sandbox.to_dict()
+    })
@@ -0,0 +1,100 @@
+import threading
+import uuid
+from datetime import datetime
+
+from models.sandbox_store import SandboxStore
+
+
+class SandboxConflict(Exception):
+    """The live state changed after the sandbox was created."""
+
+
+class Sandbox:
+    """A what-if session: a copy-on-write store, its own date and logs."""
+
+    def __init__(self, base_store, current_date):
+        self.sandbox_id = str(uuid.uuid4())
+        self.store = SandboxStore(base_store)
+        self.base_date = current_date
+        self.current_date = current_date
+        self.logs = []
+        self.created_at = datetime.now().isoformat()
+
+    def to_dict(self):
+        return {
+            "sandboxId": self.sandbox_id,
+            "createdAt": self.created_at,
+            "baseDate": self.base_date,
+            "currentDate": self.current_date,
+            "changedItems": len(self.store.changed_items()),
+            "removedItems": len(self.store.removed_item_ids()),
+            "numLogs": len(self.logs)
+        }
+
+
+class SandboxManager:
+    """
+    Keeps the open sandboxes of the live store.
+
+    Sandboxes never modify the live state until they are committed. A
+    commit is all or nothing: it is refused if the live store or date
+    changed since the sandbox was created, and otherwise applies the
+    sandbox's changes, date and logs under one lock.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._sandboxes = {}  # sandboxId -> Sandbox
+        self._lock = threading.Lock()
+
+    def create(self, current_date):
+        sandbox = Sandbox(self.store, current_date)
+        with self._lock:
+            self._sandboxes[sandbox.sandbox_id] = sandbox
+        return sandbox
+
+    def get(self, sandbox_id):
+        return self._sandboxes.get(sandbox_id)
+
+    def discard(self, sandbox_id):
+        with self._lock:
+            return self._sandboxes.pop(sandbox_id, None)
+
+    def commit(self, sandbox_id, config):
+        """
+        Apply a sandbox to the live state and close it.
+
+        Args:
+            sandbox_id: ID of the sandbox
+            config: Application config holding CURRENT_DATE and LOGS
+
+        Returns:
+            sandbox: The committed sandbox, or None if it does not exist
+        """
+        with self._lock, self.store.lock:
+            sandbox = self._sandboxes.get(sandbox_id)
+            if sandbox is None:
+                return None
+
+            sandbox_store = sandbox.store
+            if (self.store.version() != sandbox_store.base_version or
+                    config.get('CURRENT_DATE') != sandbox.base_date):
+                raise SandboxConflict("Live inventory changed since the sandbox was created")
+
+            if sandbox_store.containers_replaced:
+                self.store.load_containers(sandbox_store.changed_containers())
+            else:
+                for container in sandbox_store.changed_containers():
+                    self.store.add_container(container)
+
+            for item_id in sandbox_store.removed_item_ids():
+                self.store.remove_item(item_id)
+            for item in sandbox_store.changed_items():
+                self.store.add_item(item)
+
+            config['CURRENT_DATE'] = sandbox.current_date
+            config['LOGS'].extend(sandbox.logs)
+
+            del self._sandboxes[sandbox_id]
+
+        return sandbox
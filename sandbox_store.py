@@ -0,0 +1,227 @@
+from models.store import InventoryStore, locked
+from algorithms.spatial_index import RTree, position_to_box
+
+
+class SandboxStore(InventoryStore):
+    """
+    Copy-on-write view of an InventoryStore.
+
+    Reads fall through to the base store. The first change to an item or
+    container copies it into the sandbox's own indexes and hides the base
+    version, so only what a forecast touches is copied and the base store
+    is never modified. Queries merge the base results (minus hidden
+    entries) with the sandbox's own.
+    """
+
+    def __init__(self, base):
+        super().__init__()
+        self._base = base
+        # One lock for the sandbox and its base, so they never wait on each other in opposite orders
+        self._lock = base.lock
+        self._base_version = base.version()
+        self._hidden = set()  # base itemIds changed or removed in the sandbox
+        self._containers_replaced = False
+        self._merged_columns = None  # (versions, ItemColumns)
+        self._merged_spatial = {}  # containerId -> (versions, RTree)
+
+    @locked
+    def __len__(self):
+        return len(self._base) - len(self._hidden) + len(self._items)
+
+    @locked
+    def __contains__(self, item_id):
+        return item_id in self._items or (item_id not in self._hidden and item_id in self._base)
+
+    @property
+    def base(self):
+        return self._base
+
+    @property
+    def base_version(self):
+        """Version of the base store when the sandbox was created."""
+        return self._base_version
+
+    @locked
+    def changed_items(self):
+        return list(self._items.values())
+
+    @locked
+    def removed_item_ids(self):
+        return [item_id for item_id in self._hidden if item_id not in self._items]
+
+    @locked
+    def changed_containers(self):
+        return list(self._containers.values())
+
+    @property
+    def containers_replaced(self):
+        return self._containers_replaced
+
+    # Containers
+
+    @locked
+    def load_containers(self, containers):
+        super().load_containers(containers)
+        self._containers_replaced = True
+
+    @locked
+    def get_container(self, container_id):
+        container = self._containers.get(container_id)
+        if container is None and not self._containers_replaced:
+            container = self._base.get_container(container_id)
+        return container
+
+    @locked
+    def get_zone(self, container_id):
+        container = self.get_container(container_id)
+        return container["zone"] if container else None
+
+    @locked
+    def containers(self):
+        if self._containers_replaced:
+            return super().containers()
+        return ([c for c in self._base.containers() if c["containerId"] not in self._containers] +
+                super().containers())
+
+    @locked
+    def containers_in_zone(self, zone):
+        return [c for c in self.containers() if c["zone"] == zone]
+
+    # Items
+
+    @locked
+    def add_item(self, item):
+        base_item = self._base.get_item(item["itemId"])
+        if base_item is not None:
+            self._hidden.add(item["itemId"])
+            self._touch_base_container(base_item)
+        return super().add_item(item)
+
+    @locked
+    def get_item(self, item_id):
+        item = self._items.get(item_id)
+        if item is None and item_id not in self._hidden:
+            item = self._base.get_item(item_id)
+        return item
+
+    @locked
+    def items(self):
+        return self._visible(self._base.items()) + super().items()
+
+    @locked
+    def items_in_container(self, container_id):
+        return self._visible(self._base.items_in_container(container_id)) + super().items_in_container(container_id)
+
+    @locked
+    def items_in_zone(self, zone):
+        zone_items = []
+        for container in self.containers_in_zone(zone):
+            zone_items.extend(self.items_in_container(container["containerId"]))
+        return zone_items
+
+    @locked
+    def columns(self):
+        if not self._items and not self._hidden:
+            return self._base.columns()
+
+        versions = (self._base.version(), self._version)
+        if self._merged_columns is None or self._merged_columns[0] != versions:
+            columns = self._base.columns().copy()
+            for item_id in self._hidden:
+                columns.remove(item_id)
+            for item in self._items.values():
+                columns.set(item)
+            self._merged_columns = (versions, columns)
+
+        return self._merged_columns[1]
+
+    @locked
+    def spatial_index(self, container_id):
+        if container_id not in self._revisions:
+            return self._base.spatial_index(container_id)
+
+        versions = (self._base.revision(container_id), self._revisions[container_id])
+        cached = self._merged_spatial.get(container_id)
+        if cached is None or cached[0] != versions:
+            rtree = RTree()
+            for item in self.items_in_container(container_id):
+                if item.get("position"):
+                    rtree.insert(item["itemId"], position_to_box(item["position"]), item)
+            cached = (versions, rtree)
+            self._merged_spatial[container_id] = cached
+
+        return cached[1]
+
+    @locked
+    def revision(self, container_id):
+        return self._base.revision(container_id), self._revisions.get(container_id, 0)
+
+    @locked
+    def update_item(self, item_id, **changes):
+        if item_id not in self._items:
+            item = self._copy_on_write(item_id)
+            if item is None:
+                return None
+        return super().update_item(item_id, **changes)
+
+    @locked
+    def remove_item(self, item_id):
+        item = self.get_item(item_id)
+        if item is None:
+            return None
+
+        self._version += 1
+        if item_id in self._base:
+            self._hidden.add(item_id)
+            self._touch_base_container(item)
+        if item_id in self._items:
+            super().remove_item(item_id)
+
+        return item
+
+    # Waste
+
+    @locked
+    def expired_items(self, current_date):
+        return self._visible(self._base.expired_items(current_date)) + super().expired_items(current_date)
+
+    @locked
+    def items_expiring_between(self, start_date, end_date):
+        return (self._visible(self._base.items_expiring_between(start_date, end_date)) +
+                super().items_expiring_between(start_date, end_date))
+
+    @locked
+    def depleted_items(self):
+        return self._visible(self._base.depleted_items()) + super().depleted_items()
+
+    def _visible(self, base_items):
+        if not self._hidden:
+            return base_items
+        return [item for item in base_items if item["itemId"] not in self._hidden]
+
+    def _replace_items(self, items):
+        for item in self._base.items():
+            self._hidden.add(item["itemId"])
+            self._touch_base_container(item)
+        super()._replace_items(items)
+
+    def _copy_on_write(self, item_id):
+        if item_id in self._hidden:
+            return None
+
+        item = self._base.get_item(item_id)
+        if item is None:
+            return None
+
+        copy = dict(item)
+        if item.get("position"):
+            copy["position"] = {key: dict(value) for key, value in item["position"].items()}
+
+        self._hidden.add(item_id)
+        self._touch_base_container(item)
+        return super().add_item(copy)
+
+    def _touch_base_container(self, item):
+        # The merged R-tree of the item's container has to be rebuilt
+        if item.get("containerId"):
+            self._touch(item["containerId"])
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify, current_app
 from algorithms.search import bm25_spatial_filtering_search
-from algorithms.retrieval import retrieval_algorithm_3d_a_star_rtree
+from algorithms.retrieval import retrieval_algorithm_3d_a_star_rtree, batch_retrieval_plan
 import uuid
 from datetime import datetime
 
@@ -13,7 +13,7 @@ def search():
     item_name = request.args.get('itemName')
     user_id = request.args.get('userId', 'anonymous')
 
-    items = current_app.config.get('ITEMS', [])
+    store = current_app.config['STORE']
     current_date = current_app.config.get('CURRENT_DATE', '2025-04-06')
 
     # Must provide either itemId or itemName
@@ -22,9 +22,9 @@ def search():
 
     # Search by ID or name
     if item_id:
-        found_item = next((item for item in items if item.get("itemId") == item_id), None)
+        found_item = store.get_item(item_id)
     else:
-        search_results = bm25_spatial_filtering_search(item_name, items, current_date)
+        search_results = bm25_spatial_filtering_search(item_name, store.items(), current_date)
         found_item = search_results[0] if search_results else None
 
     # If item not found
@@ -41,7 +41,11 @@ def search():
     retrieval_steps = []
 
     if container_id:
-        retrieval_steps = retrieval_algorithm_3d_a_star_rtree(found_item, container_id, items)
+        # The R-tree is the store's own; keep it from changing while it is searched
+        with store.lock:
+            retrieval_steps = retrieval_algorithm_3d_a_star_rtree(
+                found_item, container_id, rtree=store.spatial_index(container_id)
+            )
 
     # Log the search operation
     timestamp = datetime.now().isoformat()
@@ -67,14 +71,86 @@ def search():
             "itemId": found_item.get("itemId"),
             "name": found_item.get("name"),
             "containerId": container_id,
-            "zone": next((c["zone"] for c in current_app.config.get('CONTAINERS', [])
-                          if c["containerId"] == container_id), None),
+            "zone": store.get_zone(container_id),
             "position": found_item.get("position")
         },
         "retrievalSteps": retrieval_steps
     })
 
 
+@search_bp.route('/search/batch', methods=['POST'])
+def search_batch():
+    data = request.get_json()
+
+    if not data:
+        return jsonify({"success": False, "error": "No data provided"}), 400
+
+    item_ids = data.get('itemIds', [])
+    user_id = data.get('userId', 'anonymous')
+
+    if not isinstance(item_ids, list):
+        return jsonify({"success": False, "error": "Item IDs must be a list"}), 400
+
+    if not item_ids:
+        return jsonify({"success": False, "error": "Item IDs are required"}), 400
+
+    store = current_app.config['STORE']
+
+    found_items = []
+    not_found = []
+
+    for item_id in dict.fromkeys(item_ids):
+        item = store.get_item(item_id)
+        if item:
+            found_items.append(item)
+        else:
+            not_found.append(item_id)
+
+    # Generate merged retrieval steps for all found items; the R-trees are
+    # the store's own, so keep them from changing while they are searched
+    with store.lock:
+        spatial = {}
+        for item in found_items:
+            container_id = item.get("containerId")
+            if container_id and container_id not in spatial:
+                spatial[container_id] = store.spatial_index(container_id)
+
+        retrieval_steps = batch_retrieval_plan(found_items, spatial=spatial)
+
+    # Log the search operations
+    timestamp = datetime.now().isoformat()
+    for item in found_items:
+        log = {
+            "logId": str(uuid.uuid4()),
+            "timestamp": timestamp,
+            "userId": user_id,
+            "actionType": "search",
+            "itemId": item.get("itemId"),
+            "containerId": item.get("containerId"),
+            "details": {
+                "searchTerm": f"ID: {item.get('itemId')}",
+                "found": True,
+                "batchSize": len(item_ids)
+            }
+        }
+        current_app.config['LOGS'].append(log)
+
+    return jsonify({
+        "success": True,
+        "items": [
+            {
+                "itemId": item.get("itemId"),
+                "name": item.get("name"),
+                "containerId": item.get("containerId"),
+                "zone": store.get_zone(item.get("containerId")),
+                "position": item.get("position")
+            } for item in found_items
+        ],
+        "notFound": not_found,
+        "retrievalSteps": retrieval_steps
+    })
+
+
 @search_bp.route('/retrieve', methods=['POST'])
 def retrieve():
     data = request.get_json()
@@ -89,15 +165,15 @@ def retrieve():
     if not item_id:
         return jsonify({"success": False, "error": "Item ID is required"}), 400
 
-    items = current_app.config.get('ITEMS', [])
-    item_index = next((i for i, item in enumerate(items) if item.get("itemId") == item_id), None)
+    store = current_app.config['STORE']
+    item = store.get_item(item_id)
 
-    if item_index is None:
+    if item is None:
         return jsonify({"success": False, "error": "Item not found"}), 404
 
     # Update usage count
-    if "usesRemaining" in items[item_index]:
-        items[item_index]["usesRemaining"] -= 1
+    if item.get("usesRemaining") is not None:
+        store.update_item(item_id, usesRemaining=item["usesRemaining"] - 1)
 
     # Log the retrieval operation
     log_id = str(uuid.uuid4())
@@ -107,9 +183,9 @@ def retrieve():
         "userId": user_id,
         "actionType": "retrieval",
         "itemId": item_id,
-        "containerId": items[item_index].get("containerId"),
+        "containerId": item.get("containerId"),
         "details": {
-            "usesRemaining": items[item_index].get("usesRemaining")
+            "usesRemaining": item.get("usesRemaining")
         }
     }
     current_app.config['LOGS'].append(log)
@@ -133,15 +209,11 @@ def place():
     if not item_id or not container_id or not position:
         return jsonify({"success": False, "error": "Item ID, container ID, and position are required"}), 400
 
-    items = current_app.config.get('ITEMS', [])
-    item_index = next((i for i, item in enumerate(items) if item.get("itemId") == item_id), None)
-
-    if item_index is None:
-        return jsonify({"success": False, "error": "Item not found"}), 404
+    store = current_app.config['STORE']
 
     # Update item position
-    items[item_index]["containerId"] = container_id
-    items[item_index]["position"] = position
+    if store.set_location(item_id, container_id, position) is None:
+        return jsonify({"success": False, "error": "Item not found"}), 404
 
     # Log the placement operation
     log_id = str(uuid.uuid4())
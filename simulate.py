@@ -1,7 +1,12 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
+from api.sandbox import get_store, get_current_date, set_current_date, append_log
 from datetime import datetime, timedelta
+import math
 import uuid
 
+from config import DEFAULT_FORECAST_TRAJECTORIES, MAX_FORECAST_TRAJECTORIES
+from services.simulation_service import simulate_usage, simulate_events, forecast_usage, USAGE_DISTRIBUTIONS
+
 simulate_bp = Blueprint('simulate', __name__)
 
 
@@ -10,7 +15,7 @@ def simulate_day():
     data = request.get_json()
 
     # Get current date
-    current_date_str = current_app.config.get('CURRENT_DATE', '2025-04-06')
+    current_date_str = get_current_date()
 
     try:
         current_date = datetime.fromisoformat(current_date_str)
@@ -22,11 +27,11 @@ def simulate_day():
     new_date_str = new_date.isoformat().split('T')[0]
 
     # Update system date
-    current_app.config['CURRENT_DATE'] = new_date_str
+    set_current_date(new_date_str)
 
     # Process used items
     items_used = data.get('itemsUsed', []) if data else []
-    items = current_app.config.get('ITEMS', [])
+    store = get_store()
 
     # Track changes
     usage_changes = []
@@ -37,15 +42,13 @@ def simulate_day():
         item_id = used_item.get('itemId')
         uses = used_item.get('uses', 1)
 
-        item_index = next((i for i, item in enumerate(items) if item.get("itemId") == item_id), None)
-
-        if item_index is not None:
-            item = items[item_index]
+        item = store.get_item(item_id)
 
+        if item is not None:
             # Update uses remaining
-            if "usesRemaining" in item:
+            if item.get("usesRemaining") is not None:
                 old_uses = item["usesRemaining"]
-                item["usesRemaining"] = max(0, old_uses - uses)
+                item = store.update_item(item_id, usesRemaining=max(0, old_uses - uses))
 
                 # Track change
                 usage_changes.append({
@@ -56,20 +59,12 @@ def simulate_day():
                 })
 
     # Check for newly expired items
-    for item in items:
-        expiry_date = item.get("expiryDate")
-
-        if expiry_date:
-            try:
-                if datetime.fromisoformat(expiry_date) <= new_date and datetime.fromisoformat(
-                        expiry_date) > current_date:
-                    expired_items.append({
-                        "itemId": item.get("itemId"),
-                        "name": item.get("name", ""),
-                        "expiryDate": expiry_date
-                    })
-            except ValueError:
-                pass
+    for item in store.items_expiring_between(current_date, new_date):
+        expired_items.append({
+            "itemId": item.get("itemId"),
+            "name": item.get("name", ""),
+            "expiryDate": item.get("expiryDate")
+        })
 
     # Log the simulation operation
     timestamp = datetime.now().isoformat()
@@ -86,7 +81,7 @@ def simulate_day():
             "newlyExpired": len(expired_items)
         }
     }
-    current_app.config['LOGS'].append(log)
+    append_log(log)
 
     return jsonify({
         "success": True,
@@ -111,8 +106,12 @@ def simulate_days():
     if days <= 0:
         return jsonify({"success": False, "error": "Days must be greater than 0"}), 400
 
+    mode = data.get('mode', 'daily')
+    if mode not in ('daily', 'events'):
+        return jsonify({"success": False, "error": "Mode must be 'daily' or 'events'"}), 400
+
     # Get current date
-    current_date_str = current_app.config.get('CURRENT_DATE', '2025-04-06')
+    current_date_str = get_current_date()
 
     try:
         current_date = datetime.fromisoformat(current_date_str)
@@ -124,30 +123,40 @@ def simulate_days():
     new_date_str = new_date.isoformat().split('T')[0]
 
     # Update system date
-    current_app.config['CURRENT_DATE'] = new_date_str
+    set_current_date(new_date_str)
 
     # Process used items
-    items = current_app.config.get('ITEMS', [])
+    store = get_store()
 
     # Track changes
     usage_changes = []
     expired_items = []
 
+    # Simulate the whole inventory day by day before applying the usage
+    uses_per_day = {}
+    for used_item in items_used_daily:
+        item_id = used_item.get('itemId')
+        uses_per_day[item_id] = uses_per_day.get(item_id, 0) + used_item.get('uses', 1)
+
+    with store.lock:
+        if mode == 'events':
+            timeline, depletion_days = simulate_events(store, current_date, days, uses_per_day)
+        else:
+            timeline, depletion_days = simulate_usage(store.columns(), current_date, days, uses_per_day)
+
     # Update usage count for used items (multiply by days)
     for used_item in items_used_daily:
         item_id = used_item.get('itemId')
         uses_per_day = used_item.get('uses', 1)
         total_uses = uses_per_day * days
 
-        item_index = next((i for i, item in enumerate(items) if item.get("itemId") == item_id), None)
-
-        if item_index is not None:
-            item = items[item_index]
+        item = store.get_item(item_id)
 
+        if item is not None:
             # Update uses remaining
-            if "usesRemaining" in item:
+            if item.get("usesRemaining") is not None:
                 old_uses = item["usesRemaining"]
-                item["usesRemaining"] = max(0, old_uses - total_uses)
+                item = store.update_item(item_id, usesRemaining=max(0, old_uses - total_uses))
 
                 # Track change
                 usage_changes.append({
@@ -155,24 +164,17 @@ def simulate_days():
                     "name": item.get("name", ""),
                     "previousUses": old_uses,
                     "newUses": item["usesRemaining"],
-                    "daysSimulated": days
+                    "daysSimulated": days,
+                    "depletedOnDay": depletion_days.get(item_id)
                 })
 
     # Check for newly expired items
-    for item in items:
-        expiry_date = item.get("expiryDate")
-
-        if expiry_date:
-            try:
-                expiry_datetime = datetime.fromisoformat(expiry_date)
-                if expiry_datetime <= new_date and expiry_datetime > current_date:
-                    expired_items.append({
-                        "itemId": item.get("itemId"),
-                        "name": item.get("name", ""),
-                        "expiryDate": expiry_date
-                    })
-            except ValueError:
-                pass
+    for item in store.items_expiring_between(current_date, new_date):
+        expired_items.append({
+            "itemId": item.get("itemId"),
+            "name": item.get("name", ""),
+            "expiryDate": item.get("expiryDate")
+        })
 
     # Log the simulation operation
     timestamp = datetime.now().isoformat()
@@ -186,18 +188,153 @@ def simulate_days():
             "previousDate": current_date_str,
             "newDate": new_date_str,
             "daysSimulated": days,
+            "mode": mode,
             "itemsUsedTypes": len(items_used_daily),
             "newlyExpired": len(expired_items)
         }
     }
-    current_app.config['LOGS'].append(log)
+    append_log(log)
 
-    return jsonify({
+    response = {
         "success": True,
         "newDate": new_date_str,
         "daysSimulated": days,
+        "mode": mode,
         "changes": {
             "itemsUsed": usage_changes,
             "newlyExpired": expired_items
         }
+    }
+
+    # Daily mode reports every day, event mode only the days something happens
+    if mode == 'events':
+        response["events"] = timeline
+    else:
+        response["dailySeries"] = timeline
+
+    return jsonify(response)
+
+
+@simulate_bp.route('/simulate/forecast', methods=['POST'])
+def forecast():
+    data = request.get_json()
+
+    if not data:
+        return jsonify({"success": False, "error": "No data provided"}), 400
+
+    days = data.get('days', 30)
+    trajectories = data.get('trajectories', DEFAULT_FORECAST_TRAJECTORIES)
+    percentiles = data.get('percentiles', [5, 50, 95])
+    usage = data.get('itemsUsage', [])
+
+    if not isinstance(days, int) or days <= 0:
+        return jsonify({"success": False, "error": "Days must be greater than 0"}), 400
+
+    if not isinstance(trajectories, int) or not 0 < trajectories <= MAX_FORECAST_TRAJECTORIES:
+        return jsonify({
+            "success": False,
+            "error": f"Trajectories must be between 1 and {MAX_FORECAST_TRAJECTORIES}"
+        }), 400
+
+    if not percentiles or not all(isinstance(p, (int, float)) and 0 <= p <= 100 for p in percentiles):
+        return jsonify({"success": False, "error": "Percentiles must be between 0 and 100"}), 400
+
+    seed = data.get('seed')
+    if seed is not None and (not isinstance(seed, int) or seed < 0):
+        return jsonify({"success": False, "error": "Seed must be a non-negative integer"}), 400
+
+    store = get_store()
+
+    # Usage distribution per item, e.g. {"itemId": "001", "distribution": "poisson", "mean": 2}
+    distributions = {}
+    for item_usage in usage:
+        item_id = item_usage.get('itemId')
+        kind = item_usage.get('distribution', 'poisson')
+
+        if kind not in USAGE_DISTRIBUTIONS:
+            return jsonify({
+                "success": False,
+                "error": f"Distribution must be one of: {', '.join(USAGE_DISTRIBUTIONS)}"
+            }), 400
+
+        if store.get_item(item_id) is None:
+            return jsonify({"success": False, "error": f"Item {item_id} not found"}), 400
+
+        spec = {"type": kind}
+        for key in ('mean', 'std', 'min', 'max'):
+            if key in item_usage:
+                spec[key] = item_usage[key]
+
+        error = _distribution_error(spec)
+        if error:
+            return jsonify({"success": False, "error": f"Item {item_id}: {error}"}), 400
+
+        distributions[item_id] = spec
+
+    current_date_str = get_current_date()
+    current_date = datetime.fromisoformat(current_date_str)
+
+    # The forecast can take a while; run it on a copy instead of holding the store
+    with store.lock:
+        columns = store.columns().copy()
+
+    depletion, waste_mass = forecast_usage(
+        columns, current_date, days, distributions, trajectories, percentiles, seed=seed
+    )
+
+    # Log the forecast
+    timestamp = datetime.now().isoformat()
+    log_id = str(uuid.uuid4())
+    log = {
+        "logId": log_id,
+        "timestamp": timestamp,
+        "userId": "system",
+        "actionType": "forecast",
+        "details": {
+            "date": current_date_str,
+            "daysForecast": days,
+            "trajectories": trajectories,
+            "itemsForecast": len(distributions)
+        }
+    }
+    append_log(log)
+
+    return jsonify({
+        "success": True,
+        "date": current_date_str,
+        "daysForecast": days,
+        "trajectories": trajectories,
+        "depletion": [
+            {"itemId": item_id, "name": store.get_item(item_id).get("name", ""), **bands}
+            for item_id, bands in depletion.items()
+        ],
+        "wasteMass": waste_mass
     })
+
+
+def _distribution_error(spec):
+    """
+    Check the parameters of a usage distribution.
+
+    Returns:
+        error: Message describing the first invalid parameter, or None
+    """
+    for key in ('mean', 'std', 'min', 'max'):
+        value = spec.get(key, 0)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            return f"{key} must be a number"
+
+    if spec.get('mean', 1) < 0:
+        return "mean must not be negative"
+
+    if spec.get('std', 0) < 0:
+        return "std must not be negative"
+
+    if spec['type'] == 'uniform':
+        low, high = spec.get('min', 0), spec.get('max', 1)
+        if not isinstance(low, int) or not isinstance(high, int):
+            return "min and max must be whole numbers"
+        if low < 0 or low > high:
+            return "min must be between 0 and max"
+
+    return None
@@ -0,0 +1,339 @@
+import heapq
+import math
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+
+from config import FORECAST_WORKERS, FORECAST_BATCH_SIZE
+from models.columns import NO_EXPIRY, date_ordinal
+
+# Usage distributions accepted by the forecast
+USAGE_DISTRIBUTIONS = ("fixed", "poisson", "normal", "uniform")
+
+# Below this many simulated item-days a process pool costs more than it saves
+FORECAST_PARALLEL_THRESHOLD = 5000000
+
+
+def simulate_usage(columns, start_date, days, uses_per_day):
+    """
+    Simulate daily usage and expiry of the whole inventory.
+
+    Instead of stepping item by item, the day every item becomes waste is
+    computed for all rows at once (the day its uses run out or the day after
+    it expires) and the per-day series is built from counts per day.
+
+    Args:
+        columns: ItemColumns of the inventory
+        start_date: Date the simulation starts from
+        days: Number of days to simulate
+        uses_per_day: Dict of itemId -> uses per day
+
+    Returns:
+        series: List with, per day, the items depleted and expired that day
+            and the total waste mass and volume at the end of the day
+        depletion_days: Dict of itemId -> day its uses run out, for the used
+            items that run out within the simulated days
+    """
+    start = date_ordinal(start_date)
+    rate = np.zeros(len(columns))
+    for item_id, uses in uses_per_day.items():
+        row = columns.row(item_id)
+        # Items without a usesRemaining are not counted down
+        if row is not None and columns.counted[row]:
+            rate[row] += uses
+
+    never = days + 1
+    uses = columns.uses
+
+    # Day the uses run out: 0 if they already have, never if unused
+    depleted_day = np.full(len(columns), never, dtype=np.int64)
+    used = (rate > 0) & (uses > 0)
+    depleted_day[used] = np.minimum(np.ceil(uses[used] / rate[used]), never)
+    depleted_day[uses <= 0] = 0
+
+    expiry_day = _expiry_days(columns, start, days)
+    waste_day = np.minimum(depleted_day, np.clip(expiry_day + 1, 0, never))
+
+    depleted = np.bincount(depleted_day, minlength=never + 1)
+    expired = np.bincount(np.clip(expiry_day, 0, never), minlength=never + 1)
+    waste_mass = np.cumsum(np.bincount(waste_day, weights=columns.mass, minlength=never + 1))
+    waste_volume = np.cumsum(np.bincount(waste_day, weights=columns.volume, minlength=never + 1))
+
+    series = []
+    for day in range(1, days + 1):
+        series.append({
+            "day": day,
+            "date": date.fromordinal(start + day).isoformat(),
+            "itemsDepleted": int(depleted[day]),
+            "itemsExpired": int(expired[day]),
+            "wasteMass": round(float(waste_mass[day]), 6),
+            "wasteVolume": float(waste_volume[day])
+        })
+
+    depletion_days = {}
+    for row in np.flatnonzero(used & (depleted_day <= days)):
+        depletion_days[columns.item_ids[row]] = int(depleted_day[row])
+
+    return series, depletion_days
+
+
+def simulate_events(store, start_date, days, uses_per_day):
+    """
+    Simulate daily usage and expiry by jumping from event to event.
+
+    Only items that expire within the horizon (found through the store's
+    expiry index) and items in the usage schedule get events, which are
+    kept in a heap and processed in day order, so the cost depends on the
+    number of events rather than on days x items.
+
+    Args:
+        store: InventoryStore of the inventory
+        start_date: Date the simulation starts from
+        days: Number of days to simulate
+        uses_per_day: Dict of itemId -> uses per day
+
+    Returns:
+        timeline: List with, per day on which something happens, the items
+            that expired, ran out and became waste that day and the total
+            waste mass and volume at the end of the day
+        depletion_days: Dict of itemId -> day its uses run out, for the used
+            items that run out within the simulated days
+    """
+    start = date_ordinal(start_date)
+    end_date = date.fromordinal(start + days)
+
+    # Waste on the first day, before any event
+    wasted = set()
+    waste_mass = 0.0
+    waste_volume = 0.0
+    for item, _ in store.waste_items(date.fromordinal(start + 1)):
+        wasted.add(item["itemId"])
+        waste_mass += item.get("mass", 0)
+        waste_volume += item["width"] * item["depth"] * item["height"]
+
+    events = []  # (day, kind, itemId)
+
+    for item in store.items_expiring_between(date.fromordinal(start), end_date):
+        day = date_ordinal(item["expiryDate"]) - start
+        heapq.heappush(events, (day, "expired", item["itemId"]))
+        # Waste from the day after its expiry date
+        if day < days:
+            heapq.heappush(events, (day + 1, "waste", item["itemId"]))
+
+    for item_id, rate in uses_per_day.items():
+        item = store.get_item(item_id)
+        if item is None or rate <= 0 or item.get("usesRemaining") is None:
+            continue
+        if item["usesRemaining"] > 0:
+            day = math.ceil(item["usesRemaining"] / rate)
+            if day <= days:
+                heapq.heappush(events, (day, "depleted", item_id))
+
+    timeline = []
+    depletion_days = {}
+
+    while events:
+        day = events[0][0]
+        expired = []
+        depleted = []
+        became_waste = []
+
+        while events and events[0][0] == day:
+            _, kind, item_id = heapq.heappop(events)
+            item = store.get_item(item_id)
+
+            if kind == "expired":
+                expired.append(item_id)
+                continue
+
+            if kind == "depleted":
+                depleted.append(item_id)
+                depletion_days[item_id] = day
+
+            if item_id not in wasted:
+                wasted.add(item_id)
+                became_waste.append(item_id)
+                waste_mass += item.get("mass", 0)
+                waste_volume += item["width"] * item["depth"] * item["height"]
+
+        # A waste event for an item that already ran out changes nothing
+        if not (expired or depleted or became_waste):
+            continue
+
+        timeline.append({
+            "day": day,
+            "date": date.fromordinal(start + day).isoformat(),
+            "expired": expired,
+            "depleted": depleted,
+            "wasted": became_waste,
+            "wasteMass": round(float(waste_mass), 6),
+            "wasteVolume": float(waste_volume)
+        })
+
+    return timeline, depletion_days
+
+
+def forecast_usage(columns, start_date, days, distributions, trajectories, percentiles=(5, 50, 95),
+                   workers=None, seed=None):
+    """
+    Monte Carlo forecast of depletion and waste under random daily usage.
+
+    Trajectories are simulated in batches; a batch draws the daily uses of
+    every item in the distributions for all its trajectories at once and
+    finds each depletion day with a cumulative sum. Batches run on a
+    process pool and are seeded by their index, so the result does not
+    depend on the number of workers.
+
+    Args:
+        columns: ItemColumns of the inventory
+        start_date: Date the forecast starts from
+        days: Number of days to simulate
+        distributions: Dict of itemId -> usage distribution, e.g.
+            {"type": "poisson", "mean": 2}
+        trajectories: Number of simulated trajectories
+        percentiles: Percentiles to report
+        workers: Number of worker processes (1 simulates in-process)
+        seed: Seed for the random number generators
+
+    Returns:
+        depletion: Dict of itemId -> depletion day per percentile (None if
+            the item lasts beyond the horizon) and probability of depletion
+        waste_mass: List with, per day, the total waste mass per percentile
+    """
+    workers = workers or FORECAST_WORKERS
+    start = date_ordinal(start_date)
+    never = days + 1
+
+    item_ids = [
+        item_id for item_id in distributions
+        if columns.row(item_id) is not None and columns.counted[columns.row(item_id)]
+    ]
+    rows = np.array([columns.row(item_id) for item_id in item_ids], dtype=np.int64)
+    specs = [distributions[item_id] for item_id in item_ids]
+
+    # Items without a distribution follow their deterministic waste day
+    expiry_day = _expiry_days(columns, start, days)
+    expiry_waste_day = np.clip(expiry_day + 1, 0, never)
+    fixed = np.ones(len(columns), dtype=bool)
+    fixed[rows] = False
+    fixed_waste_day = np.where(columns.uses[fixed] <= 0, 0, expiry_waste_day[fixed])
+    base_waste = np.cumsum(np.bincount(fixed_waste_day, weights=columns.mass[fixed], minlength=never + 1))
+
+    task = (columns.uses[rows], expiry_waste_day[rows], columns.mass[rows], _group_distributions(specs), days)
+
+    batch_size = max(1, FORECAST_BATCH_SIZE // max(1, days * len(rows)))
+    batches = [(k, min(batch_size, trajectories - offset))
+               for k, offset in enumerate(range(0, trajectories, batch_size))]
+    seed = seed if seed is not None else np.random.SeedSequence().entropy
+
+    if workers > 1 and len(batches) > 1 and trajectories * days * len(rows) >= FORECAST_PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                _simulate_batch, *zip(*[(task, seed, k, size) for k, size in batches])
+            ))
+    else:
+        results = [_simulate_batch(task, seed, k, size) for k, size in batches]
+
+    depletion_days = np.concatenate([r[0] for r in results])
+    waste = np.concatenate([r[1] for r in results]) + base_waste
+
+    depletion = {}
+    bands = np.percentile(depletion_days, percentiles, axis=0, method="higher") if len(rows) else []
+    for j, item_id in enumerate(item_ids):
+        depletion[item_id] = {f"p{p}": (int(band[j]) if band[j] <= days else None)
+                              for p, band in zip(percentiles, bands)}
+        depletion[item_id]["probabilityDepleted"] = float(np.mean(depletion_days[:, j] <= days))
+
+    waste_bands = np.percentile(waste, percentiles, axis=0)
+    waste_mass = []
+    for day in range(1, days + 1):
+        entry = {"day": day, "date": date.fromordinal(start + day).isoformat()}
+        for p, band in zip(percentiles, waste_bands):
+            entry[f"p{p}"] = round(float(band[day]), 6)
+        waste_mass.append(entry)
+
+    return depletion, waste_mass
+
+
+def draw_usage(rng, kind, params, size):
+    """
+    Draw non-negative daily uses for items sharing a distribution.
+
+    Random draws are whole numbers; a fixed rate is used as given, so 1.5
+    uses a day runs out on the same day as steady use at that rate.
+
+    Args:
+        rng: NumPy random generator
+        kind: Distribution type, one of USAGE_DISTRIBUTIONS
+        params: Dict of parameter name -> array with one value per item
+        size: Shape of the sample; the last axis is the items
+
+    Returns:
+        uses: Array of daily uses
+    """
+    if kind == "fixed":
+        uses = np.broadcast_to(params["mean"], size)
+    elif kind == "poisson":
+        uses = rng.poisson(params["mean"], size)
+    elif kind == "normal":
+        uses = np.rint(params["mean"] + params["std"] * rng.standard_normal(size))
+    elif kind == "uniform":
+        uses = rng.integers(params["min"], params["max"], size, endpoint=True)
+    else:
+        raise ValueError(f"Unknown usage distribution: {kind}")
+
+    return np.maximum(uses, 0)
+
+
+def _group_distributions(specs):
+    # Items sharing a distribution type are drawn in one call with per-item parameters
+    defaults = {"mean": 1, "std": 0, "min": 0, "max": 1}
+    groups = {}
+    for j, spec in enumerate(specs):
+        groups.setdefault(spec.get("type", "poisson"), []).append(j)
+
+    return [
+        (kind, np.array(cols), {
+            key: np.array([specs[j].get(key, default) for j in cols])
+            for key, default in defaults.items()
+        })
+        for kind, cols in groups.items()
+    ]
+
+
+def _expiry_days(columns, start, days):
+    # Day the item expires (its expiry date is reached); it is waste from the next day
+    never = days + 1
+    expiry = columns.expiry
+    expires = expiry != NO_EXPIRY
+    expiry_day = np.full(len(columns), never, dtype=np.int64)
+    expiry_day[expires] = np.clip(expiry[expires] - start, -1, never)
+    return expiry_day
+
+
+def _simulate_batch(task, seed, batch, size):
+    uses, expiry_waste_day, mass, groups, days = task
+    never = days + 1
+    rng = np.random.default_rng([seed, batch])
+
+    # cumulative[t, d, j] = uses of item j by the end of day d + 1 in trajectory t
+    # Floats, so a fractional fixed rate is not truncated
+    daily = np.empty((size, days, len(uses)), dtype=np.float64)
+    for kind, cols, params in groups:
+        daily[:, :, cols] = draw_usage(rng, kind, params, (size, days, len(cols)))
+    cumulative = np.cumsum(daily, axis=1, out=daily)
+
+    # First day the cumulative uses reach the uses remaining; the tolerance
+    # absorbs rounding in sums of fractional rates
+    reached = cumulative >= uses - 1e-9
+    depletion_day = np.where(reached.any(axis=1), reached.argmax(axis=1) + 1, never)
+    depletion_day[:, uses <= 0] = 0
+
+    # Waste mass per trajectory and day, from one bincount over all trajectories
+    waste_day = np.minimum(depletion_day, expiry_waste_day)
+    index = waste_day + (never + 1) * np.arange(size)[:, None]
+    waste = np.bincount(index.ravel(), weights=np.broadcast_to(mass, index.shape).ravel(),
+                        minlength=size * (never + 1))
+
+    return depletion_day, np.cumsum(waste.reshape(size, never + 1), axis=1)
@@ -0,0 +1,256 @@
+def position_to_box(position):
+    """
+    Convert an item position into an axis-aligned box.
+
+    Args:
+        position: Position dict with startCoordinates and endCoordinates
+
+    Returns:
+        box: Tuple (width1, height1, depth1, width2, height2, depth2)
+    """
+    start = position["startCoordinates"]
+    end = position["endCoordinates"]
+    return (
+        start["width"], start["height"], start["depth"],
+        end["width"], end["height"], end["depth"]
+    )
+
+
+def _union(a, b):
+    return (
+        min(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2]),
+        max(a[3], b[3]), max(a[4], b[4]), max(a[5], b[5])
+    )
+
+
+def _volume(box):
+    return (box[3] - box[0]) * (box[4] - box[1]) * (box[5] - box[2])
+
+
+def _enlargement(box, other):
+    return _volume(_union(box, other)) - _volume(box)
+
+
+def _intersects(a, b):
+    return (a[0] <= b[3] and a[3] >= b[0] and
+            a[1] <= b[4] and a[4] >= b[1] and
+            a[2] <= b[5] and a[5] >= b[2])
+
+
+def _bounding_box(entries):
+    box = entries[0][0]
+    for entry in entries[1:]:
+        box = _union(box, entry[0])
+    return box
+
+
+class _Node:
+    __slots__ = ("leaf", "entries", "parent")
+
+    def __init__(self, leaf, parent=None):
+        self.leaf = leaf
+        self.entries = []  # [box, key] in leaves, [box, child node] otherwise
+        self.parent = parent
+
+
+class RTree:
+    """
+    3D R-tree over item bounding boxes (Guttman, quadratic split).
+
+    Leaf entries are keyed by item ID so an item can be moved or removed
+    without searching the tree for it.
+    """
+
+    def __init__(self, max_entries=16, min_entries=4):
+        self.max_entries = max_entries
+        self.min_entries = min_entries
+        self._root = _Node(leaf=True)
+        self._leaf_of = {}  # key -> leaf node holding it
+        self._payloads = {}  # key -> payload
+
+    def __len__(self):
+        return len(self._payloads)
+
+    def __contains__(self, key):
+        return key in self._payloads
+
+    def insert(self, key, box, payload):
+        """Insert (or move) a payload under a key with the given box."""
+        if key in self._payloads:
+            self.delete(key)
+
+        self._payloads[key] = payload
+        self._insert_entry([box, key])
+
+    def delete(self, key):
+        """Remove a key from the tree. Returns its payload, or None."""
+        leaf = self._leaf_of.pop(key, None)
+        if leaf is None:
+            return None
+
+        leaf.entries = [e for e in leaf.entries if e[1] != key]
+        self._condense(leaf)
+
+        return self._payloads.pop(key)
+
+    def search(self, box):
+        """Return the payloads of all entries whose boxes intersect box."""
+        results = []
+        stack = [self._root]
+
+        while stack:
+            node = stack.pop()
+            for entry_box, child in node.entries:
+                if _intersects(entry_box, box):
+                    if node.leaf:
+                        results.append(self._payloads[child])
+                    else:
+                        stack.append(child)
+
+        return results
+
+    def _insert_entry(self, entry):
+        node = self._choose_leaf(entry[0])
+        node.entries.append(entry)
+        self._attach(node, entry)
+
+        if len(node.entries) > self.max_entries:
+            self._split(node)
+        else:
+            self._adjust_boxes(node)
+
+    def _choose_leaf(self, box):
+        node = self._root
+
+        while not node.leaf:
+            best = min(
+                node.entries,
+                key=lambda e: (_enlargement(e[0], box), _volume(e[0]))
+            )
+            node = best[1]
+
+        return node
+
+    def _attach(self, node, entry):
+        if node.leaf:
+            self._leaf_of[entry[1]] = node
+        else:
+            entry[1].parent = node
+
+    def _split(self, node):
+        group_a, group_b = self._quadratic_split(node.entries)
+
+        node.entries = group_a
+        sibling = _Node(leaf=node.leaf, parent=node.parent)
+        sibling.entries = group_b
+
+        for entry in group_a:
+            self._attach(node, entry)
+        for entry in group_b:
+            self._attach(sibling, entry)
+
+        if node.parent is None:
+            root = _Node(leaf=False)
+            root.entries = [[_bounding_box(group_a), node], [_bounding_box(group_b), sibling]]
+            node.parent = root
+            sibling.parent = root
+            self._root = root
+            return
+
+        parent = node.parent
+        parent.entries.append([_bounding_box(group_b), sibling])
+
+        if len(parent.entries) > self.max_entries:
+            self._adjust_boxes(node)
+            self._split(parent)
+        else:
+            self._adjust_boxes(node)
+
+    def _quadratic_split(self, entries):
+        # Pick the two seeds that would waste the most volume together
+        worst = None
+        seeds = (0, 1)
+        for i in range(len(entries)):
+            for j in range(i + 1, len(entries)):
+                waste = (_volume(_union(entries[i][0], entries[j][0])) -
+                         _volume(entries[i][0]) - _volume(entries[j][0]))
+                if worst is None or waste > worst:
+                    worst = waste
+                    seeds = (i, j)
+
+        group_a = [entries[seeds[0]]]
+        group_b = [entries[seeds[1]]]
+        box_a = group_a[0][0]
+        box_b = group_b[0][0]
+        remaining = [e for k, e in enumerate(entries) if k not in seeds]
+
+        while remaining:
+            # Make sure both groups end up with at least min_entries
+            if len(group_a) + len(remaining) == self.min_entries:
+                group_a.extend(remaining)
+                break
+            if len(group_b) + len(remaining) == self.min_entries:
+                group_b.extend(remaining)
+                break
+
+            entry = max(
+                remaining,
+                key=lambda e: abs(_enlargement(box_a, e[0]) - _enlargement(box_b, e[0]))
+            )
+            remaining.remove(entry)
+
+            grow_a = _enlargement(box_a, entry[0])
+            grow_b = _enlargement(box_b, entry[0])
+            if (grow_a, _volume(box_a), len(group_a)) <= (grow_b, _volume(box_b), len(group_b)):
+                group_a.append(entry)
+                box_a = _union(box_a, entry[0])
+            else:
+                group_b.append(entry)
+                box_b = _union(box_b, entry[0])
+
+        return group_a, group_b
+
+    def _adjust_boxes(self, node):
+        while node.parent is not None:
+            parent = node.parent
+            for entry in parent.entries:
+                if entry[1] is node:
+                    entry[0] = _bounding_box(node.entries)
+                    break
+            node = parent
+
+    def _condense(self, node):
+        orphans = []
+
+        while node.parent is not None:
+            parent = node.parent
+            if len(node.entries) < self.min_entries:
+                parent.entries = [e for e in parent.entries if e[1] is not node]
+                orphans.extend(self._leaf_entries(node))
+            else:
+                for entry in parent.entries:
+                    if entry[1] is node:
+                        entry[0] = _bounding_box(node.entries)
+                        break
+            node = parent
+
+        # Shrink the root while it only has a single child
+        while not self._root.leaf and len(self._root.entries) == 1:
+            self._root = self._root.entries[0][1]
+            self._root.parent = None
+
+        if not self._root.leaf and not self._root.entries:
+            self._root = _Node(leaf=True)
+
+        # Reinsert the entries of removed nodes
+        for entry in orphans:
+            self._insert_entry(entry)
+
+    def _leaf_entries(self, node):
+        if node.leaf:
+            return list(node.entries)
+
+        entries = []
+        for _, child in node.entries:
+            entries.extend(self._leaf_entries(child))
+        return entries
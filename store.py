@@ -0,0 +1,439 @@
+import bisect
+import functools
+import threading
+
+from models.container import Container
+from models.columns import ItemColumns, date_ordinal
+from algorithms.spatial_index import RTree, position_to_box
+
+# Item fields mirrored in the columnar table
+COLUMN_FIELDS = frozenset((
+    "expiryDate", "usesRemaining", "usageLimit", "mass", "width", "depth", "height",
+    "priority", "containerId"
+))
+
+# Defaults of the optional item fields, as in the Item model. usesRemaining
+# is left unset, so an item without a usage count is not counted down
+ITEM_DEFAULTS = {
+    "mass": 0,
+    "priority": 50,
+    "expiryDate": None,
+    "usageLimit": 1,
+    "preferredZone": "",
+    "containerId": None,
+    "position": None
+}
+
+
+def locked(method):
+    """Run a store method while holding the store's lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class InventoryStore:
+    """
+    In-memory store for items and containers.
+
+    Items and containers are kept as plain dicts (the same shape the API
+    returns): items as given, with the optional fields defaulted, and
+    containers normalised through the Container model, together with
+    hash indexes by itemId, containerId and zone and a per-container R-tree
+    over item positions. Waste is indexed too: a sorted list of
+    (expiry ordinal, itemId) and the set of items with no uses left, so
+    expiry and waste queries are range lookups instead of inventory scans.
+    The numeric attributes are also mirrored in an ItemColumns table for
+    vectorized inventory-wide queries. Every mutation goes through the
+    store so the indexes stay consistent.
+
+    Every public method runs under one re-entrant lock, so request threads
+    and background jobs can share the store; callers that need several
+    calls to be atomic (read the arrangement, then replace it) hold
+    store.lock around them.
+    """
+
+    def __init__(self):
+        self._items = {}  # itemId -> item
+        self._containers = {}  # containerId -> container
+        self._items_by_container = {}  # containerId -> {itemId: item}
+        self._containers_by_zone = {}  # zone -> {containerId: container}
+        self._spatial = {}  # containerId -> RTree of placed items
+        self._revisions = {}  # containerId -> revision of its contents
+        self._revision_counter = 0
+        self._expiry = []  # sorted (expiry ordinal, itemId)
+        self._depleted = set()  # itemIds with no uses remaining
+        self._columns = ItemColumns()
+        self._version = 0  # bumped on every mutation
+        self._lock = threading.RLock()
+
+    @property
+    def lock(self):
+        """
+        Re-entrant lock held by every store method. Background jobs and
+        callers that read and then write hold it to make the calls atomic.
+        """
+        return self._lock
+
+    @locked
+    def __len__(self):
+        return len(self._items)
+
+    @locked
+    def __contains__(self, item_id):
+        return item_id in self._items
+
+    # Containers
+
+    @locked
+    def load_containers(self, containers):
+        """
+        Replace all containers.
+
+        containers may be any iterable; it is read in full before anything
+        changes, so if it fails part way the store is left as it was.
+        """
+        staged = {}
+        for container in containers:
+            container = Container.from_dict(container).to_dict()
+            staged[container["containerId"]] = container
+
+        containers_by_zone = {}
+        for container_id, container in staged.items():
+            containers_by_zone.setdefault(container["zone"], {})[container_id] = container
+
+        self._version += 1
+        for container_id in set(self._containers) | set(staged):
+            self._touch(container_id)
+        self._containers = staged
+        self._containers_by_zone = containers_by_zone
+
+    @locked
+    def add_container(self, container):
+        container = Container.from_dict(container).to_dict()
+        container_id = container["containerId"]
+        self._version += 1
+
+        if container_id in self._containers:
+            self._unindex_container(self._containers[container_id])
+
+        self._touch(container_id)
+        self._containers[container_id] = container
+        self._containers_by_zone.setdefault(container["zone"], {})[container_id] = container
+
+        return container
+
+    @locked
+    def get_container(self, container_id):
+        return self._containers.get(container_id)
+
+    @locked
+    def get_zone(self, container_id):
+        container = self._containers.get(container_id)
+        return container["zone"] if container else None
+
+    @locked
+    def containers(self):
+        return list(self._containers.values())
+
+    @locked
+    def containers_in_zone(self, zone):
+        return list(self._containers_by_zone.get(zone, {}).values())
+
+    def _unindex_container(self, container):
+        zone_containers = self._containers_by_zone.get(container["zone"])
+        if zone_containers is not None:
+            zone_containers.pop(container["containerId"], None)
+            if not zone_containers:
+                del self._containers_by_zone[container["zone"]]
+
+    # Items
+
+    @locked
+    def load_items(self, items):
+        """
+        Replace all items.
+
+        items may be any iterable, e.g. a generator over an upload. It is
+        read and normalised in full and the new indexes are built on the
+        side before anything changes, so if it fails part way the store is
+        left as it was.
+        """
+        staged = {}
+        for item in items:
+            item = _normalise_item(item)
+            staged[item["itemId"]] = item
+
+        self._replace_items(staged)
+
+    @locked
+    def add_item(self, item):
+        item = _normalise_item(item)
+        item_id = item["itemId"]
+        self._version += 1
+
+        if item_id in self._items:
+            self._unindex_item(self._items[item_id])
+            self._unindex_waste(self._items[item_id])
+
+        self._items[item_id] = item
+        self._index_item(item)
+        self._index_waste(item)
+        self._columns.set(item)
+
+        return item
+
+    @locked
+    def get_item(self, item_id):
+        return self._items.get(item_id)
+
+    @locked
+    def items(self):
+        return list(self._items.values())
+
+    @locked
+    def items_in_container(self, container_id):
+        return list(self._items_by_container.get(container_id, {}).values())
+
+    @locked
+    def items_in_zone(self, zone):
+        zone_items = []
+        for container_id in self._containers_by_zone.get(zone, {}):
+            zone_items.extend(self.items_in_container(container_id))
+        return zone_items
+
+    @locked
+    def columns(self):
+        """Return the ItemColumns table of the inventory."""
+        return self._columns
+
+    @locked
+    def spatial_index(self, container_id):
+        """Return the R-tree of items placed in a container, or None."""
+        return self._spatial.get(container_id)
+
+    @locked
+    def version(self):
+        """Return a number that changes whenever anything in the store changes."""
+        return self._version
+
+    @locked
+    def revision(self, container_id):
+        """
+        Return a number that changes whenever the container or its contents
+        change, so callers can cache per-container derived data.
+        """
+        return self._revisions.get(container_id, 0)
+
+    @locked
+    def update_item(self, item_id, **changes):
+        """
+        Update fields of an item, keeping the indexes in sync.
+
+        Args:
+            item_id: ID of the item to update
+            **changes: Item fields to set, using the API field names
+
+        Returns:
+            item: The updated item, or None if it does not exist
+        """
+        item = self._items.get(item_id)
+        if item is None:
+            return None
+
+        self._version += 1
+        relocated = "containerId" in changes or "position" in changes
+        waste_changed = "expiryDate" in changes or "usesRemaining" in changes
+
+        if relocated:
+            self._unindex_item(item)
+        if waste_changed:
+            self._unindex_waste(item)
+        item.update(changes)
+        if relocated:
+            self._index_item(item)
+        if waste_changed:
+            self._index_waste(item)
+        if not COLUMN_FIELDS.isdisjoint(changes):
+            self._columns.set(item)
+
+        return item
+
+    @locked
+    def set_location(self, item_id, container_id, position):
+        return self.update_item(item_id, containerId=container_id, position=position)
+
+    @locked
+    def remove_item(self, item_id):
+        item = self._items.pop(item_id, None)
+        if item is not None:
+            self._version += 1
+            self._unindex_item(item)
+            self._unindex_waste(item)
+            self._columns.remove(item_id)
+        return item
+
+    @locked
+    def remove_container_items(self, container_id):
+        """Remove every item stowed in a container and return them."""
+        removed = self.items_in_container(container_id)
+        for item in removed:
+            self.remove_item(item["itemId"])
+        return removed
+
+    # Waste
+
+    @locked
+    def expired_items(self, current_date):
+        """Items whose expiry date is before current_date."""
+        end = bisect.bisect_left(self._expiry, (date_ordinal(current_date),))
+        return [self._items[item_id] for _, item_id in self._expiry[:end]]
+
+    @locked
+    def items_expiring_between(self, start_date, end_date):
+        """Items that expire after start_date and on or before end_date."""
+        start = bisect.bisect_left(self._expiry, (date_ordinal(start_date) + 1,))
+        end = bisect.bisect_left(self._expiry, (date_ordinal(end_date) + 1,))
+        return [self._items[item_id] for _, item_id in self._expiry[start:end]]
+
+    @locked
+    def depleted_items(self):
+        """Items with no uses remaining."""
+        return [self._items[item_id] for item_id in self._depleted]
+
+    @locked
+    def zone_utilization(self):
+        """
+        Share of container volume used by stowed items, per zone.
+
+        Returns:
+            utilization: Dict of zone -> (used volume, total volume)
+        """
+        columns = self.columns()
+        used_by_container = columns.volume_by_container()
+        utilization = {}
+
+        for container in self.containers():
+            index = columns.container_index(container["containerId"])
+            used = float(used_by_container[index]) if 0 <= index < len(used_by_container) else 0.0
+            total = container["width"] * container["depth"] * container["height"]
+
+            zone_used, zone_total = utilization.get(container["zone"], (0.0, 0.0))
+            utilization[container["zone"]] = (zone_used + used, zone_total + total)
+
+        return utilization
+
+    @locked
+    def waste_items(self, current_date):
+        """
+        Find waste items at a date.
+
+        Args:
+            current_date: Current system date
+
+        Returns:
+            waste: List of (item, reason) pairs, expired items first
+        """
+        expired = self.expired_items(current_date)
+        expired_ids = set(item["itemId"] for item in expired)
+
+        waste = [(item, "Expired") for item in expired]
+        waste.extend(
+            (item, "Out of Uses")
+            for item in self.depleted_items() if item["itemId"] not in expired_ids
+        )
+        return waste
+
+    def _replace_items(self, items):
+        # Build every index for the new items, then swap them in together
+        items_by_container = {}
+        spatial = {}
+        depleted = set()
+
+        for item_id, item in items.items():
+            container_id = item.get("containerId")
+            if container_id:
+                items_by_container.setdefault(container_id, {})[item_id] = item
+                if item.get("position"):
+                    rtree = spatial.setdefault(container_id, RTree())
+                    rtree.insert(item_id, position_to_box(item["position"]), item)
+
+            if _uses_remaining(item) <= 0:
+                depleted.add(item_id)
+
+        # Build the sorted and columnar indexes once instead of per item
+        ordinals = ((date_ordinal(item.get("expiryDate")), item_id) for item_id, item in items.items())
+        expiry = sorted(entry for entry in ordinals if entry[0] is not None)
+        columns = ItemColumns.from_items(list(items.values()))
+
+        self._version += 1
+        for container_id in set(self._items_by_container) | set(items_by_container):
+            self._touch(container_id)
+
+        self._items = items
+        self._items_by_container = items_by_container
+        self._spatial = spatial
+        self._expiry = expiry
+        self._depleted = depleted
+        self._columns = columns
+
+    def _touch(self, container_id):
+        self._revision_counter += 1
+        self._revisions[container_id] = self._revision_counter
+
+    def _index_item(self, item):
+        container_id = item.get("containerId")
+        if container_id:
+            self._touch(container_id)
+            self._items_by_container.setdefault(container_id, {})[item["itemId"]] = item
+
+            if item.get("position"):
+                rtree = self._spatial.setdefault(container_id, RTree())
+                rtree.insert(item["itemId"], position_to_box(item["position"]), item)
+
+    def _unindex_item(self, item):
+        container_id = item.get("containerId")
+        container_items = self._items_by_container.get(container_id)
+        if container_items is not None:
+            self._touch(container_id)
+            container_items.pop(item["itemId"], None)
+            if not container_items:
+                del self._items_by_container[container_id]
+
+        rtree = self._spatial.get(container_id)
+        if rtree is not None:
+            rtree.delete(item["itemId"])
+            if not len(rtree):
+                del self._spatial[container_id]
+
+    def _index_waste(self, item):
+        ordinal = date_ordinal(item.get("expiryDate"))
+        if ordinal is not None:
+            bisect.insort(self._expiry, (ordinal, item["itemId"]))
+
+        if _uses_remaining(item) <= 0:
+            self._depleted.add(item["itemId"])
+
+    def _unindex_waste(self, item):
+        ordinal = date_ordinal(item.get("expiryDate"))
+        if ordinal is not None:
+            k = bisect.bisect_left(self._expiry, (ordinal, item["itemId"]))
+            if k < len(self._expiry) and self._expiry[k] == (ordinal, item["itemId"]):
+                del self._expiry[k]
+
+        self._depleted.discard(item["itemId"])
+
+
+def _normalise_item(item):
+    # A copy, so the caller's dict is not indexed; unknown fields are kept
+    normalised = dict(item)
+    for field, default in ITEM_DEFAULTS.items():
+        normalised.setdefault(field, default)
+    return normalised
+
+
+def _uses_remaining(item):
+    uses = item.get("usesRemaining")
+    return uses if uses is not None else item.get("usageLimit", 1)
@@ -0,0 +1,108 @@
+import itertools
+import random
+
+import pytest
+
+from algorithms.waste_management import (
+    branch_and_bound_knapsack,
+    fptas_knapsack,
+    knapsack_01_dp,
+    mass_volume_knapsack,
+    select_return_items,
+)
+
+
+def _random_items(rng, n):
+    # Masses in tenths of a kg, so every solver is exact at its resolution
+    # and sums like 0.1 + 0.2 hit the float noise at the limit
+    return [
+        {
+            "itemId": str(k),
+            "mass": rng.randint(1, 30) / 10,
+            "width": 1,
+            "depth": 1,
+            "height": rng.randint(1, 50)
+        }
+        for k in range(n)
+    ]
+
+
+def _brute_force(items, max_weight, max_volume=float("inf")):
+    best = 0
+    for r in range(len(items) + 1):
+        for subset in itertools.combinations(items, r):
+            volume = sum(item["height"] for item in subset)
+            if round(sum(item["mass"] for item in subset), 6) <= max_weight and volume <= max_volume:
+                best = max(best, volume)
+    return best
+
+
+def _instances(count=60):
+    rng = random.Random(7)
+    for _ in range(count):
+        items = _random_items(rng, rng.randint(1, 10))
+        # Limits that are met exactly by some subset as well as arbitrary ones
+        subset = rng.sample(items, rng.randint(1, len(items)))
+        max_weight = round(sum(item["mass"] for item in subset), 1)
+        yield items, max_weight
+        yield items, rng.randint(0, 60) / 10
+
+
+def _check_selection(selected, total_weight, total_volume, max_weight):
+    assert round(sum(item["mass"] for item in selected), 6) <= max_weight
+    assert total_weight == pytest.approx(sum(item["mass"] for item in selected))
+    assert total_volume == pytest.approx(sum(item["height"] for item in selected))
+
+
+def test_dp_matches_brute_force():
+    for items, max_weight in _instances():
+        selected, total_weight, total_volume = knapsack_01_dp(items, max_weight)
+        _check_selection(selected, total_weight, total_volume, max_weight)
+        assert total_volume == _brute_force(items, max_weight)
+
+
+def test_branch_and_bound_matches_brute_force():
+    for items, max_weight in _instances():
+        selected, total_weight, total_volume, upper_bound = branch_and_bound_knapsack(items, max_weight)
+        _check_selection(selected, total_weight, total_volume, max_weight)
+        optimum = _brute_force(items, max_weight)
+        assert total_volume == optimum
+        assert upper_bound == pytest.approx(optimum)
+
+
+def test_fptas_within_epsilon_of_brute_force():
+    epsilon = 0.1
+    for items, max_weight in _instances():
+        selected, total_weight, total_volume, upper_bound = fptas_knapsack(items, max_weight, epsilon)
+        _check_selection(selected, total_weight, total_volume, max_weight)
+        optimum = _brute_force(items, max_weight)
+        assert total_volume >= (1 - epsilon) * optimum - 1e-9
+        assert upper_bound >= optimum - 1e-9
+
+
+def test_mass_volume_matches_brute_force():
+    rng = random.Random(11)
+    for items, max_weight in _instances():
+        # One volume bucket per unit of the integer volumes, so the DP is exact
+        max_volume = rng.randint(1, 150)
+        selected, total_weight, total_volume, upper_bound = mass_volume_knapsack(
+            items, max_weight, max_volume, volume_states=max_volume
+        )
+        _check_selection(selected, total_weight, total_volume, max_weight)
+        assert total_volume <= max_volume
+        optimum = _brute_force(items, max_weight, max_volume)
+        assert total_volume == optimum
+        assert upper_bound >= optimum - 1e-9
+
+
+def test_exact_limit_is_selected():
+    items = [
+        {"itemId": "a", "mass": 0.1, "width": 1, "depth": 1, "height": 10},
+        {"itemId": "b", "mass": 0.2, "width": 1, "depth": 1, "height": 10},
+        {"itemId": "c", "mass": 0.3, "width": 1, "depth": 1, "height": 1}
+    ]
+    for solver in ("dp", "branchAndBound", "fptas", "massVolume"):
+        selected, total_weight, total_volume, upper_bound = select_return_items(items, 0.3, solver)
+        assert [item["itemId"] for item in selected] == ["a", "b"], solver
+        assert total_volume == 20
+        assert upper_bound >= 20
@@ -1,6 +1,8 @@
-from flask import Blueprint, request, jsonify, current_app
-from algorithms.waste_management import knapsack_01_dp, generate_return_plan
+from flask import Blueprint, request, jsonify
+from api.sandbox import get_store, get_current_date, append_log
+from algorithms.waste_management import generate_return_plan, KNAPSACK_SOLVERS
 from datetime import datetime
+import math
 import uuid
 
 waste_bp = Blueprint('waste', __name__)
@@ -8,23 +10,20 @@ waste_bp = Blueprint('waste', __name__)
 
 @waste_bp.route('/waste/identify', methods=['GET'])
 def identify_waste():
-    items = current_app.config.get('ITEMS', [])
-    current_date = current_app.config.get('CURRENT_DATE', '2025-04-06')
+    store = get_store()
+    current_date = get_current_date()
 
     # Identify waste items
     waste_items = []
 
-    for item in items:
-        is_waste, reason = is_item_waste(item, current_date)
-
-        if is_waste:
-            waste_items.append({
-                "itemId": item["itemId"],
-                "name": item.get("name", ""),
-                "reason": reason,
-                "containerId": item.get("containerId"),
-                "position": item.get("position")
-            })
+    for item, reason in store.waste_items(current_date):
+        waste_items.append({
+            "itemId": item["itemId"],
+            "name": item.get("name", ""),
+            "reason": reason,
+            "containerId": item.get("containerId"),
+            "position": item.get("position")
+        })
 
     # Log the waste identification operation
     timestamp = datetime.now().isoformat()
@@ -39,7 +38,7 @@ def identify_waste():
             "currentDate": current_date
         }
     }
-    current_app.config['LOGS'].append(log)
+    append_log(log)
 
     return jsonify({
         "success": True,
@@ -57,28 +56,47 @@ def return_plan():
     undocking_container_id = data.get('undockingContainerId')
     undocking_date = data.get('undockingDate')
     max_weight = data.get('maxWeight', 1000)  # Default to 1000 kg if not specified
+    solver = data.get('solver')
+    epsilon = data.get('epsilon')
 
     if not undocking_container_id or not undocking_date:
         return jsonify({"success": False, "error": "Undocking container ID and date are required"}), 400
 
-    items = current_app.config.get('ITEMS', [])
-    current_date = current_app.config.get('CURRENT_DATE', '2025-04-06')
+    if solver is not None and solver not in KNAPSACK_SOLVERS:
+        return jsonify({"success": False, "error": f"Solver must be one of {', '.join(KNAPSACK_SOLVERS)}"}), 400
 
-    # Identify waste items
-    waste_items = []
+    if not _is_number(max_weight) or max_weight < 0:
+        return jsonify({"success": False, "error": "Max weight must be a non-negative number"}), 400
 
-    for item in items:
-        is_waste, reason = is_item_waste(item, current_date)
+    if epsilon is not None and not (_is_number(epsilon) and 0 < epsilon < 1):
+        return jsonify({"success": False, "error": "Epsilon must be a number between 0 and 1"}), 400
 
-        if is_waste:
+    store = get_store()
+    current_date = get_current_date()
+
+    # The R-trees are the store's own; keep them from changing while they are searched
+    with store.lock:
+        # Identify waste items
+        waste_items = []
+
+        for item, reason in store.waste_items(current_date):
             waste_item = item.copy()
             waste_item["wasteReason"] = reason
             waste_items.append(waste_item)
 
-    # Generate return plan
-    return_plan, retrieval_steps, return_manifest = generate_return_plan(
-        waste_items, undocking_container_id, max_weight, items
-    )
+        # Items in front of the waste are found through the R-trees of its containers
+        spatial = {}
+        for item in waste_items:
+            container_id = item.get("containerId")
+            if container_id and container_id not in spatial:
+                spatial[container_id] = store.spatial_index(container_id)
+
+        # Generate return plan
+        return_plan, retrieval_steps, return_manifest = generate_return_plan(
+            waste_items, undocking_container_id, max_weight,
+            store.items_in_container(undocking_container_id), solver, epsilon,
+            store.get_container(undocking_container_id), spatial
+        )
 
     # Log the return plan operation
     timestamp = datetime.now().isoformat()
@@ -92,10 +110,11 @@ def return_plan():
         "details": {
             "undockingDate": undocking_date,
             "maxWeight": max_weight,
+            "solver": return_manifest["solver"],
             "numItemsSelected": len(return_manifest["returnItems"])
         }
     }
-    current_app.config['LOGS'].append(log)
+    append_log(log)
 
     return jsonify({
         "success": True,
@@ -118,20 +137,10 @@ def complete_undocking():
     if not undocking_container_id:
         return jsonify({"success": False, "error": "Undocking container ID is required"}), 400
 
-    items = current_app.config.get('ITEMS', [])
+    store = get_store()
 
-    # Find items in undocking container
-    items_in_container = [i for i in items if i.get("containerId") == undocking_container_id]
-
-    # Remove items from the system
-    items_removed = 0
-    for item in items_in_container:
-        if item in items:
-            items.remove(item)
-            items_removed += 1
-
-    # Update items in the system
-    current_app.config['ITEMS'] = items
+    # Remove items in undocking container from the system
+    items_removed = len(store.remove_container_items(undocking_container_id))
 
     # Log the undocking operation
     log_id = str(uuid.uuid4())
@@ -145,7 +154,7 @@ def complete_undocking():
             "itemsRemoved": items_removed
         }
     }
-    current_app.config['LOGS'].append(log)
+    append_log(log)
 
     return jsonify({
         "success": True,
@@ -153,28 +162,5 @@ def complete_undocking():
     })
 
 
-def is_item_waste(item, current_date):
-    """
-    Check if an item is considered waste.
-
-    Args:
-        item: Item to check
-        current_date: Current system date
-
-    Returns:
-        is_waste: True if item is waste, False otherwise
-        reason: Reason for waste status
-    """
-    # Check expiry date
-    if item.get("expiryDate"):
-        try:
-            if datetime.fromisoformat(current_date) > datetime.fromisoformat(item["expiryDate"]):
-                return True, "Expired"
-        except ValueError:
-            pass
-
-    # Check usage limit
-    if item.get("usesRemaining", item.get("usageLimit", 1)) <= 0:
-        return True, "Out of Uses"
-
-    return False, None
+def _is_number(value):
+    return not isinstance(value, bool) and isinstance(value, (int, float)) and math.isfinite(value)
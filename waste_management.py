@@ -1,62 +1,494 @@
-def knapsack_01_dp(waste_items, max_weight):
+import bisect
+
+import numpy as np
+
+from algorithms.retrieval import batch_retrieval_plan
+from config import (
+    KNAPSACK_MASS_RESOLUTION,
+    BRANCH_AND_BOUND_MAX_NODES,
+    DEFAULT_FPTAS_EPSILON,
+    KNAPSACK_VOLUME_STATES,
+)
+from services.placement_service import FreeSpaceMap, box_to_position
+
+# Solvers selectable for the return plan; "massVolume" also limits volume
+KNAPSACK_SOLVERS = ("dp", "branchAndBound", "fptas", "massVolume")
+
+# Mass unit of the solvers without a DP table over mass, in kg: masses given
+# to the milligram scale to exact integers
+EXACT_MASS_RESOLUTION = 1e-6
+
+
+def knapsack_01_dp(waste_items, max_weight, resolution=None):
     """
     Implements the 0-1 Knapsack (Dynamic Programming) algorithm for waste management.
 
+    Masses are scaled to integer units of `resolution` kg (rounded up, so the
+    selection never exceeds the real limit). The DP runs as a rolling 1-D
+    array updated once per item, and the take/skip decisions are kept as a
+    bitset per item to reconstruct the selection.
+
     Args:
         waste_items: List of waste items
         max_weight: Maximum weight capacity of the return container
+        resolution: Mass resolution in kg (defaults to KNAPSACK_MASS_RESOLUTION)
 
     Returns:
         selected_items: List of selected items for return
         total_weight: Total weight of selected items
         total_volume: Total volume of selected items
     """
+    resolution = resolution or KNAPSACK_MASS_RESOLUTION
     n = len(waste_items)
 
     # If no waste items or no capacity, return empty selection
-    if n == 0 or max_weight == 0:
+    if n == 0 or max_weight <= 0:
         return [], 0, 0
 
-    # Create weight and value arrays
-    weights = [item.get("mass", 0) for item in waste_items]
-
-    # Calculate volume for each item
-    volumes = []
-    for item in waste_items:
-        width = item.get("width", 0)
-        depth = item.get("depth", 0)
-        height = item.get("height", 0)
-        volume = width * depth * height
-        volumes.append(volume)
-
-    # Create DP table
-    dp = [[0 for _ in range(max_weight + 1)] for _ in range(n + 1)]
-
-    # Fill the DP table
-    for i in range(1, n + 1):
-        for w in range(1, max_weight + 1):
-            if weights[i - 1] <= w:
-                dp[i][w] = max(volumes[i - 1] + dp[i - 1][w - weights[i - 1]], dp[i - 1][w])
-            else:
-                dp[i][w] = dp[i - 1][w]
+    masses, volumes = _knapsack_arrays(waste_items)
+
+    weights, capacity = _scaled_masses(masses, max_weight, resolution)
+
+    # dp[w] = best volume with total scaled weight <= w
+    dp = np.zeros(capacity + 1)
+    decisions = [None] * n
+
+    for i in range(n):
+        w = weights[i]
+        if w > capacity or volumes[i] <= 0:
+            continue
+
+        candidate = dp[:capacity + 1 - w] + volumes[i]
+        take = candidate > dp[w:]
+        if not take.any():
+            continue
+
+        dp[w:] = np.where(take, candidate, dp[w:])
+        decisions[i] = np.packbits(np.concatenate((np.zeros(w, dtype=bool), take)))
 
     # Retrieve selected items
     selected_items = []
     total_weight = 0
     total_volume = 0
-    w = max_weight
+    c = capacity
+
+    for i in range(n - 1, -1, -1):
+        if decisions[i] is not None and _bit(decisions[i], c):
+            selected_items.append(waste_items[i])
+            total_weight += masses[i]
+            total_volume += volumes[i]
+            c -= weights[i]
+
+    selected_items.reverse()
+
+    return selected_items, round(float(total_weight), 6), float(total_volume)
+
+
+def branch_and_bound_knapsack(waste_items, max_weight, max_nodes=None):
+    """
+    Exact 0-1 Knapsack by depth-first branch-and-bound.
+
+    Items are visited in decreasing volume/mass ratio and every node is
+    bounded by the fractional (Dantzig) relaxation of the remaining items.
+    Masses are scaled to integer units of EXACT_MASS_RESOLUTION kg, so a
+    selection that exactly meets the limit is not lost to float rounding
+    and no practical resolution is lost. If `max_nodes` is reached the best selection so far is returned with the largest open
+    bound as its upper bound.
+
+    Args:
+        waste_items: List of waste items
+        max_weight: Maximum weight capacity of the return container
+        max_nodes: Node limit (defaults to BRANCH_AND_BOUND_MAX_NODES)
+
+    Returns:
+        selected_items: List of selected items for return
+        total_weight: Total weight of selected items
+        total_volume: Total volume of selected items
+        upper_bound: Proven upper bound on the optimal volume
+    """
+    max_nodes = max_nodes or BRANCH_AND_BOUND_MAX_NODES
+
+    if not waste_items or max_weight <= 0:
+        return [], 0, 0, 0
+
+    masses, volumes = _knapsack_arrays(waste_items)
+    scaled, max_units = _scaled_masses(masses, max_weight, EXACT_MASS_RESOLUTION)
+    order, free = _ratio_order(scaled, volumes, max_units)
+    weights = scaled[order].tolist()
+    values = volumes[order].tolist()
+    prefix_weight = [0] + np.cumsum(scaled[order]).tolist()
+    prefix_value = [0.0] + np.cumsum(values).tolist()
+    n = len(order)
+
+    def bound(level, capacity):
+        # Items level..k-1 fit whole, item k fills the rest fractionally
+        k = bisect.bisect_right(prefix_weight, prefix_weight[level] + capacity, level) - 1
+        value = prefix_value[k] - prefix_value[level]
+        if k < n:
+            value += values[k] * (capacity - (prefix_weight[k] - prefix_weight[level])) / weights[k]
+        return value
+
+    # Taken items are kept as a trail of (parent, index) so nodes stay small
+    trail = []
+    best_value = 0.0
+    best_node = -1
+    stack = [(0, max_units, 0.0, -1)]
+    nodes = 0
+
+    while stack and nodes < max_nodes:
+        level, capacity, value, node = stack.pop()
+        nodes += 1
+
+        if value > best_value:
+            best_value = value
+            best_node = node
+
+        if level == n or value + bound(level, capacity) <= best_value + 1e-9:
+            continue
+
+        # Skip branch first on the stack so the take branch is explored first
+        stack.append((level + 1, capacity, value, node))
+        if weights[level] <= capacity:
+            trail.append((node, level))
+            stack.append((level + 1, capacity - weights[level], value + values[level], len(trail) - 1))
+
+    upper_bound = best_value
+    for level, capacity, value, _ in stack:
+        upper_bound = max(upper_bound, value + bound(level, capacity))
+
+    selected = list(free)
+    while best_node != -1:
+        best_node, level = trail[best_node]
+        selected.append(order[level])
+
+    free_volume = float(volumes[free].sum()) if free else 0.0
+    return _selection(waste_items, sorted(selected), masses, volumes) + (upper_bound + free_volume,)
+
+
+def fptas_knapsack(waste_items, max_weight, epsilon=None):
+    """
+    Approximate 0-1 Knapsack within a factor (1 - epsilon) of the optimum.
+
+    Follows Ibarra and Kim: items worth more than epsilon times a greedy
+    lower bound are "large" and go through a DP over scaled volumes that
+    keeps the lightest set for each volume, so the table has O(1/epsilon^2)
+    entries regardless of the number of items or the mass resolution. The
+    remaining capacity of each DP state is filled greedily with the small
+    items. Masses are scaled to integer units of EXACT_MASS_RESOLUTION kg,
+    so sums of masses compare exactly against the limit.
+
+    Args:
+        waste_items: List of waste items
+        max_weight: Maximum weight capacity of the return container
+        epsilon: Approximation parameter in (0, 1) (defaults to DEFAULT_FPTAS_EPSILON)
+
+    Returns:
+        selected_items: List of selected items for return
+        total_weight: Total weight of selected items
+        total_volume: Total volume of selected items
+        upper_bound: Proven upper bound on the optimal volume
+    """
+    epsilon = epsilon or DEFAULT_FPTAS_EPSILON
+
+    if not waste_items or max_weight <= 0:
+        return [], 0, 0, 0
+
+    masses, volumes = _knapsack_arrays(waste_items)
+    weights, capacity = _scaled_masses(masses, max_weight, EXACT_MASS_RESOLUTION)
+    order, free = _ratio_order(weights, volumes, capacity)
+    free_volume = float(volumes[free].sum()) if free else 0.0
+
+    if not order:
+        return _selection(waste_items, free, masses, volumes) + (free_volume,)
+
+    # Greedy lower bound (at least half the optimum) and Dantzig upper bound
+    prefix_weight = np.concatenate(([0], np.cumsum(weights[order])))
+    prefix_value = np.concatenate(([0.0], np.cumsum(volumes[order])))
+    k = int(np.searchsorted(prefix_weight, capacity, side="right")) - 1
+    lower_bound = max(prefix_value[k], volumes[order].max())
+    upper_bound = float(prefix_value[k])
+    if k < len(order):
+        upper_bound += volumes[order[k]] * (capacity - prefix_weight[k]) / weights[order[k]]
+
+    # Halve epsilon: rounding the large items and the greedy fill each lose
+    # at most epsilon/2 of the optimum
+    half = epsilon / 2
+    threshold = half * lower_bound
+    scale = half * half * lower_bound / 2
+    large = [i for i in order if volumes[i] > threshold]
+    small = np.array([i for i in order if volumes[i] <= threshold], dtype=np.int64)
+
+    # min_weight[p] = lightest large-item set with scaled volume p; the
+    # integer masses stay exact in float64
+    states = int(upper_bound // scale) + 1
+    min_weight = np.full(states, np.inf)
+    min_weight[0] = 0.0
+    value = np.zeros(states)
+    decisions = []
+
+    for i in large:
+        p = int(volumes[i] // scale)
+        if p >= states:
+            decisions.append(None)
+            continue
+
+        candidate = min_weight[:states - p] + weights[i]
+        take = (candidate < min_weight[p:]) & (candidate <= capacity)
+        min_weight[p:] = np.where(take, candidate, min_weight[p:])
+        value[p:] = np.where(take, value[:states - p] + volumes[i], value[p:])
+        decisions.append((p, np.packbits(np.concatenate((np.zeros(p, dtype=bool), take)))))
+
+    # Fill every feasible state with the best greedy prefix of small items
+    small_weight = np.concatenate(([0], np.cumsum(weights[small])))
+    small_value = np.concatenate(([0.0], np.cumsum(volumes[small])))
+    feasible = np.isfinite(min_weight)
+    remaining = np.where(feasible, capacity - min_weight, -1.0)
+    fill = np.searchsorted(small_weight, remaining, side="right") - 1
+    totals = np.where(feasible, value + small_value[np.maximum(fill, 0)], -1.0)
+    state = int(np.argmax(totals))
+
+    selected = list(free) + small[:fill[state]].tolist()
+    for i, decision in zip(reversed(large), reversed(decisions)):
+        if decision is not None and _bit(decision[1], state):
+            selected.append(i)
+            state -= decision[0]
+
+    return _selection(waste_items, sorted(selected), masses, volumes) + (upper_bound + free_volume,)
+
+
+def mass_volume_knapsack(waste_items, max_weight, max_volume=None, volume_states=None):
+    """
+    0-1 Knapsack that maximizes returned volume under both a mass and a
+    volume limit.
+
+    Volumes are scaled to `volume_states` buckets of the volume limit
+    (rounded up, so the real limit is never exceeded) and a rolling NumPy
+    array keeps, for every scaled volume, only the lightest selection
+    reaching it; heavier selections of the same volume are dominated and
+    selections over the mass limit are dropped. Masses are scaled to
+    integer units of EXACT_MASS_RESOLUTION kg, so they compare exactly
+    against the limit. The decisions are kept as a bitset per item to
+    rebuild the selection.
+
+    Args:
+        waste_items: List of waste items
+        max_weight: Maximum weight capacity of the return container
+        max_volume: Maximum volume of the return container, or None
+        volume_states: Number of volume buckets (defaults to KNAPSACK_VOLUME_STATES)
 
-    for i in range(n, 0, -1):
-        if dp[i][w] != dp[i - 1][w]:
-            selected_items.append(waste_items[i - 1])
-            total_weight += weights[i - 1]
-            total_volume += volumes[i - 1]
-            w -= weights[i - 1]
+    Returns:
+        selected_items: List of selected items for return
+        total_weight: Total weight of selected items
+        total_volume: Total volume of selected items
+        upper_bound: Proven upper bound on the optimal volume
+    """
+    volume_states = volume_states or KNAPSACK_VOLUME_STATES
+
+    if not waste_items or max_weight < 0 or (max_volume is not None and max_volume <= 0):
+        return [], 0, 0, 0
+
+    masses, volumes = _knapsack_arrays(waste_items)
+    weights, capacity = _scaled_masses(masses, max_weight, EXACT_MASS_RESOLUTION)
+    limit = max_volume if max_volume is not None else float("inf")
+    candidates = np.flatnonzero((weights <= capacity) & (volumes > 0) & (volumes <= limit))
+
+    if not len(candidates):
+        return [], 0, 0, 0
+
+    bucket = (max_volume if max_volume is not None else float(volumes[candidates].sum())) / volume_states
+    scaled = np.ceil(np.round(volumes / bucket, 6)).astype(np.int64)
+
+    # Without a volume limit every item must fit, whatever the rounding
+    states = volume_states if max_volume is not None else volume_states + len(candidates)
+
+    # min_mass[v] = lightest selection with scaled volume v, volume[v] its real
+    # volume; the integer masses stay exact in float64
+    min_mass = np.full(states + 1, np.inf)
+    min_mass[0] = 0.0
+    volume = np.zeros(states + 1)
+    decisions = []
+
+    for i in candidates:
+        v = scaled[i]
+        if v > states:
+            decisions.append(None)
+            continue
+
+        candidate = min_mass[:states + 1 - v] + weights[i]
+        take = (candidate < min_mass[v:]) & (candidate <= capacity)
+        if not take.any():
+            decisions.append(None)
+            continue
+
+        min_mass[v:] = np.where(take, candidate, min_mass[v:])
+        volume[v:] = np.where(take, volume[:states + 1 - v] + volumes[i], volume[v:])
+        decisions.append(np.packbits(np.concatenate((np.zeros(v, dtype=bool), take))))
+
+    state = int(np.argmax(np.where(np.isfinite(min_mass), volume, -1.0)))
+    selected = []
+    for i, bits in zip(reversed(candidates), reversed(decisions)):
+        if bits is not None and _bit(bits, state):
+            selected.append(int(i))
+            state -= scaled[i]
+
+    upper_bound = _fractional_bound(masses, volumes, max_weight)
+    if max_volume is not None:
+        upper_bound = min(upper_bound, max_volume)
+    return _selection(waste_items, sorted(selected), masses, volumes) + (upper_bound,)
+
+
+def select_return_items(waste_items, max_weight, solver="dp", epsilon=None, max_volume=None):
+    """
+    Select waste items for return with the given knapsack solver.
 
+    Args:
+        waste_items: List of waste items
+        max_weight: Maximum weight capacity of the return container
+        solver: One of KNAPSACK_SOLVERS
+        epsilon: Approximation parameter for the FPTAS
+        max_volume: Volume limit for the "massVolume" solver, or None
+
+    Returns:
+        selected_items: List of selected items for return
+        total_weight: Total weight of selected items
+        total_volume: Total volume of selected items
+        upper_bound: Proven upper bound on the optimal volume
+    """
+    if solver == "massVolume":
+        selected_items, total_weight, total_volume, upper_bound = mass_volume_knapsack(
+            waste_items, max_weight, max_volume
+        )
+    elif solver == "branchAndBound":
+        selected_items, total_weight, total_volume, upper_bound = branch_and_bound_knapsack(
+            waste_items, max_weight
+        )
+    elif solver == "fptas":
+        selected_items, total_weight, total_volume, upper_bound = fptas_knapsack(
+            waste_items, max_weight, epsilon
+        )
+        # The FPTAS guarantee may be tighter than the fractional bound
+        upper_bound = min(upper_bound, total_volume / (1 - (epsilon or DEFAULT_FPTAS_EPSILON)))
+    elif solver == "dp":
+        selected_items, total_weight, total_volume = knapsack_01_dp(waste_items, max_weight)
+        # The DP is exact at its mass resolution; bound it against the real masses
+        masses, volumes = _knapsack_arrays(waste_items)
+        upper_bound = _fractional_bound(masses, volumes, max_weight)
+    else:
+        raise ValueError(f"Unknown knapsack solver: {solver}")
+
+    return selected_items, total_weight, total_volume, max(upper_bound, total_volume)
+
+
+def pack_return_container(selected_items, undocking_container, container_items):
+    """
+    Check that the selected items physically fit the undocking container.
+
+    Items already in the container keep their place; the others are packed
+    largest first into the free space around the current contents.
+
+    Args:
+        selected_items: Items selected for return
+        undocking_container: The undocking container
+        container_items: Items currently in the undocking container
+
+    Returns:
+        placements: Placements of the selected items inside the container
+        unplaced: Selected items that do not fit
+    """
+    container_id = undocking_container["containerId"]
+    free_space = FreeSpaceMap.from_items(undocking_container, container_items)
+
+    placements = []
+    unplaced = []
+
+    for item in sorted(selected_items, key=lambda i: -_volume(i)):
+        if item.get("containerId") == container_id and item.get("position"):
+            position = item["position"]
+        else:
+            box = free_space.find_fit(item)
+            if box is None:
+                unplaced.append(item)
+                continue
+            free_space.occupy(box)
+            position = box_to_position(box)
+
+        placements.append({"itemId": item["itemId"], "containerId": container_id, "position": position})
+
+    return placements, unplaced
+
+
+def optimality_gap(total_volume, upper_bound):
+    """Upper bound on (optimum - volume) / optimum."""
+    if upper_bound <= 0:
+        return 0.0
+    return round(max(upper_bound - total_volume, 0.0) / upper_bound, 6)
+
+
+def _volume(item):
+    return item.get("width", 0) * item.get("depth", 0) * item.get("height", 0)
+
+
+def _bit(bits, k):
+    return (bits[k >> 3] >> (7 - (k & 7))) & 1
+
+
+def _knapsack_arrays(waste_items):
+    masses = np.array([max(float(item.get("mass", 0) or 0), 0.0) for item in waste_items])
+    volumes = np.array([
+        float(item.get("width", 0)) * float(item.get("depth", 0)) * float(item.get("height", 0))
+        for item in waste_items
+    ])
+    return masses, volumes
+
+
+def _scaled_masses(masses, max_weight, resolution):
+    """
+    Integer masses and capacity in units of `resolution` kg. Masses round
+    up and the capacity down, so a selection never exceeds the real limit;
+    rounding to 6 decimals first absorbs float noise like 0.30000000000000004.
+    """
+    weights = np.ceil(np.round(masses / resolution, 6)).astype(np.int64)
+    capacity = int(np.floor(round(max_weight / resolution, 6)))
+    return weights, capacity
+
+
+def _ratio_order(masses, volumes, max_weight):
+    """
+    Split items into massless ones that are always taken and the rest in
+    decreasing volume/mass ratio. Items heavier than the limit are dropped.
+    """
+    free = [i for i in range(len(masses)) if masses[i] == 0 and volumes[i] > 0]
+    candidates = np.flatnonzero((masses > 0) & (masses <= max_weight) & (volumes > 0))
+    ratios = volumes[candidates] / masses[candidates]
+    order = candidates[np.argsort(-ratios, kind="stable")].tolist()
+    return order, free
+
+
+def _fractional_bound(masses, volumes, max_weight):
+    order, free = _ratio_order(masses, volumes, max_weight)
+    bound = float(volumes[free].sum()) if free else 0.0
+    capacity = max_weight
+
+    for i in order:
+        if masses[i] <= capacity:
+            capacity -= masses[i]
+            bound += volumes[i]
+        else:
+            bound += volumes[i] * capacity / masses[i]
+            break
+
+    return bound
+
+
+def _selection(waste_items, indices, masses, volumes):
+    selected_items = [waste_items[i] for i in indices]
+    total_weight = round(float(masses[indices].sum()), 6) if indices else 0
+    total_volume = float(volumes[indices].sum()) if indices else 0
     return selected_items, total_weight, total_volume
 
 
-def generate_return_plan(waste_items, undocking_container_id, max_weight, all_items):
+def generate_return_plan(waste_items, undocking_container_id, max_weight, all_items,
+                         solver=None, epsilon=None, undocking_container=None, spatial=None):
     """
     Generate a plan for returning waste items.
 
@@ -64,21 +496,70 @@ def generate_return_plan(waste_items, undocking_container_id, max_weight, all_it
         waste_items: List of waste items
         undocking_container_id: ID of the container for undocking
         max_weight: Maximum weight limit
-        all_items: All items in the system
+        all_items: Items in the system; at least those in the undocking
+            container, and those in front of the waste unless `spatial` is given
+        solver: Knapsack solver, one of KNAPSACK_SOLVERS (defaults to "massVolume"
+            when the undocking container is known, "dp" otherwise)
+        epsilon: Approximation parameter for the FPTAS solver
+        undocking_container: The undocking container, if known; the
+            selection is then limited to its free volume and packed into it
+        spatial: Mapping of container ID to the R-tree of its items, used
+            to find the items in front of the selected waste
 
     Returns:
         return_plan: List of steps for waste return
         retrieval_steps: List of retrieval steps
         return_manifest: Manifest for returned items
     """
+    solver = solver or ("massVolume" if undocking_container else "dp")
+    undocking_items = [item for item in all_items if item.get("containerId") == undocking_container_id]
+
+    # Free volume of the undocking container, counting waste already in it
+    max_volume = None
+    if undocking_container:
+        waste_ids = set(item["itemId"] for item in waste_items)
+        max_volume = (undocking_container["width"] * undocking_container["depth"] *
+                      undocking_container["height"] -
+                      sum(_volume(item) for item in undocking_items if item["itemId"] not in waste_ids))
+
     # Use Knapsack to select items
-    selected_items, total_weight, total_volume = knapsack_01_dp(waste_items, max_weight)
+    selected_items, total_weight, total_volume, upper_bound = select_return_items(
+        waste_items, max_weight, solver, epsilon, max_volume
+    )
+
+    # Pack the selection into the undocking container, dropping what does not fit
+    placements = []
+    unplaced = []
+    if undocking_container:
+        placements, unplaced = pack_return_container(selected_items, undocking_container, undocking_items)
+        if unplaced:
+            unplaced_ids = set(item["itemId"] for item in unplaced)
+            selected_items = [item for item in selected_items if item["itemId"] not in unplaced_ids]
+            total_weight = round(sum(item.get("mass", 0) for item in selected_items), 6)
+            total_volume = float(sum(_volume(item) for item in selected_items))
+
+    # Retrieval steps for all selected items at once, so an item blocking
+    # several of them is moved only once; items already in the undocking
+    # container need no retrieval
+    to_retrieve = [item for item in selected_items if item.get("containerId") != undocking_container_id]
+    source_containers = set(item.get("containerId") for item in to_retrieve)
+    container_items = {}
+    for item in all_items:
+        if item.get("containerId") in source_containers:
+            container_items.setdefault(item["containerId"], []).append(item)
+
+    retrieval_steps = batch_retrieval_plan(to_retrieve, container_items, spatial)
+
+    # Generate return plan, in the order the items come out
+    retrieval_order = {}
+    for step in retrieval_steps:
+        if step["action"] == "retrieve":
+            retrieval_order[step["itemId"]] = step["step"]
 
-    # Generate return plan
     return_plan = []
     step_counter = 1
 
-    for item in selected_items:
+    for item in sorted(selected_items, key=lambda i: retrieval_order.get(i["itemId"], 0)):
         return_plan.append({
             "step": step_counter,
             "itemId": item["itemId"],
@@ -88,22 +569,6 @@ def generate_return_plan(waste_items, undocking_container_id, max_weight, all_it
         })
         step_counter += 1
 
-    # Generate retrieval steps for selected items
-    retrieval_steps = []
-    step_retrieval = 1
-
-    for item in selected_items:
-        container_id = item.get("containerId", "")
-        if container_id:
-            # Find blocking items for this item
-            retrieval_result = []
-
-            # Add retrieval steps
-            for step in retrieval_result:
-                step["step"] = step_retrieval
-                retrieval_steps.append(step)
-                step_retrieval += 1
-
     # Generate return manifest
     return_manifest = {
         "undockingContainerId": undocking_container_id,
@@ -116,7 +581,12 @@ def generate_return_plan(waste_items, undocking_container_id, max_weight, all_it
             } for item in selected_items
         ],
         "totalVolume": total_volume,
-        "totalWeight": total_weight
+        "totalWeight": total_weight,
+        "totalMoves": len(retrieval_steps),
+        "solver": solver,
+        "optimalityGap": optimality_gap(total_volume, upper_bound),
+        "placements": placements,
+        "unplacedItems": [item["itemId"] for item in unplaced]
     }
 
     return return_plan, retrieval_steps, return_manifest